@@ -4,6 +4,8 @@
 Netflix風のモダンなUIで営業部門の売上レポート作成を完全自動化
 """
 
+import hashlib
+import io
 import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
@@ -25,12 +27,22 @@ from src.visualizer import (
     plot_regional_sales,
     plot_category_breakdown,
     plot_profit_margin,
+    make_line_trace,
+    build_plot_aggregates,
     GraphGenerationError
 )
-from src.predictor import SalesPredictor
-from src.pdf_generator import ModernPDFReport
 import plotly.graph_objects as go
+import plotly.io as pio
 import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+# ロガー設定（ライブラリモジュールではルートロガーを設定しない）
+logging.basicConfig(level=logging.INFO)
+
+# バックグラウンドで生成中のPDFレポートの状態確認間隔（秒）
+REPORT_POLL_INTERVAL = 0.5
 
 # ページ設定
 st.set_page_config(
@@ -54,12 +66,197 @@ except FileNotFoundError:
 # セッションステート初期化
 if 'data' not in st.session_state:
     st.session_state.data = None
+if 'data_sig' not in st.session_state:
+    st.session_state.data_sig = None
 if 'original_data' not in st.session_state:
     st.session_state.original_data = None
 if 'uploaded_files_count' not in st.session_state:
     st.session_state.uploaded_files_count = 0
 if 'page' not in st.session_state:
     st.session_state.page = "データアップロード"
+if 'pdf_job' not in st.session_state:
+    st.session_state.pdf_job = None
+if 'pdf_report' not in st.session_state:
+    st.session_state.pdf_report = None
+
+# ============================================================================
+# キャッシュ付きデータ読み込み
+# ============================================================================
+
+def _df_sig(df: pd.DataFrame) -> tuple:
+    """
+    DataFrameのシグネチャ（形状・カラム構成・全行のハッシュ）を作成する
+
+    一部の行だけが異なるデータセットを取り違えないよう、全行のハッシュを順序どおりにダイジェストする
+    （行ハッシュの合計では行の入れ替えや打ち消し合う変更を区別できない）。
+    データ読み込み時に1回だけ計算し、以降の集計キャッシュのキーとして使い回す。
+
+    Args:
+        df: 対象のDataFrame
+
+    Returns:
+        tuple: キャッシュキーとして使用するシグネチャ
+    """
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return (df.shape, tuple(df.columns), hashlib.blake2b(row_hashes.tobytes()).hexdigest())
+
+
+def _parse_upload(file_bytes: bytes, name: str) -> pd.DataFrame:
+    """アップロードされたCSV（バイト列）を読み込む"""
+    buffer = io.BytesIO(file_bytes)
+    buffer.name = name
+    buffer.size = len(file_bytes)
+    return load_csv(buffer)
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _load_uploads(contents: tuple) -> tuple:
+    """
+    アップロードされたCSVを読み込み・クリーニングし、複数ファイルの場合は統合する
+
+    ファイル内容（bytes）と名前の組をキーにキャッシュされるため、再実行時に再パース・再統合しない。
+    各ファイルのパースはワーカースレッドで並列に行い（ワーカーからはStreamlitのAPIを呼ばない）、
+    クリーニングは統合後に1回だけ行う。
+    シグネチャも合わせてキャッシュし、再実行のたびに全行をハッシュしない。
+
+    Returns:
+        tuple: (クリーニング済みDataFrame, シグネチャ)
+    """
+    if len(contents) == 1:
+        df = clean_data(_parse_upload(*contents[0]))
+    else:
+        with ThreadPoolExecutor(max_workers=min(8, len(contents))) as executor:
+            dfs = list(executor.map(lambda c: _parse_upload(*c), contents))
+
+        df = clean_data(merge_dataframes(dfs))
+    return df, _df_sig(df)
+
+
+@st.cache_data(show_spinner=False, persist="disk")
+def _load_sample(path: str, mtime: float) -> tuple:
+    """
+    サンプルCSVを読み込み・クリーニングする
+
+    ファイルの更新日時（mtime）をキーにディスクへ永続キャッシュする。
+
+    Returns:
+        tuple: (クリーニング済みDataFrame, シグネチャ)
+    """
+    df = clean_data(load_csv(path))
+    return df, _df_sig(df)
+
+
+# ============================================================================
+# キャッシュ付き集計
+# ============================================================================
+
+# シグネチャ（sig引数）をキャッシュキーとするため、DataFrame引数自体はハッシュしない
+_DF_HASH_FUNCS = {pd.DataFrame: lambda _: None}
+
+
+@st.cache_data(show_spinner=False, hash_funcs=_DF_HASH_FUNCS)
+def _kpis(sig: tuple, df: pd.DataFrame) -> dict:
+    """主要業績指標（総売上・総利益・利益率・注文数）を集計する"""
+    total_sales = float(df['Sales'].sum()) if 'Sales' in df.columns else 0
+    total_profit = float(df['Profit'].sum()) if 'Profit' in df.columns else 0
+    return {
+        'total_sales': total_sales,
+        'total_profit': total_profit,
+        'margin': (total_profit / total_sales * 100) if total_sales > 0 else 0,
+        'total_orders': df['Order ID'].nunique() if 'Order ID' in df.columns else len(df)
+    }
+
+
+@st.cache_data(show_spinner=False, hash_funcs=_DF_HASH_FUNCS)
+def _top_products(sig: tuple, df: pd.DataFrame, top_n: int = 10) -> pd.DataFrame:
+    """売上上位商品のテーブルを作成する"""
+    product_sales = df.groupby('Product Name', sort=False, observed=True)['Sales'].sum()
+    return product_sales.nlargest(top_n).reset_index()
+
+
+@st.cache_data(show_spinner=False, hash_funcs=_DF_HASH_FUNCS)
+def _describe(sig: tuple, df: pd.DataFrame) -> pd.DataFrame:
+    """統計情報（describe）を作成する"""
+    return df.describe()
+
+
+# ダッシュボードで使用するグラフ生成関数
+_DASHBOARD_PLOTS = {
+    'sales_trend': plot_sales_trend,
+    'customer_analysis': plot_customer_analysis,
+    'regional_sales': plot_regional_sales,
+    'product_ranking': plot_product_ranking,
+    'yoy_comparison': plot_yoy_comparison,
+}
+
+
+@st.cache_data(show_spinner=False, hash_funcs=_DF_HASH_FUNCS)
+def _plot_aggregates(sig: tuple, df: pd.DataFrame) -> dict:
+    """全グラフで共有する集計を作成する"""
+    return build_plot_aggregates(df)
+
+
+@st.cache_data(show_spinner=False, hash_funcs=_DF_HASH_FUNCS)
+def _figure_json(sig: tuple, plot_name: str, df: pd.DataFrame, **kwargs) -> str:
+    """グラフを生成し、JSON文字列としてキャッシュする"""
+    return _DASHBOARD_PLOTS[plot_name](df, aggregates=_plot_aggregates(sig, df), **kwargs).to_json()
+
+
+def _cached_figure(sig: tuple, plot_name: str, df: pd.DataFrame, **kwargs) -> go.Figure:
+    """キャッシュ済みのJSONからグラフを復元する"""
+    return pio.from_json(_figure_json(sig, plot_name, df, **kwargs))
+
+
+@st.cache_data(show_spinner=False, hash_funcs=_DF_HASH_FUNCS)
+def _excel_bytes(sig: tuple, df: pd.DataFrame) -> bytes:
+    """Excelファイル（バイナリ）を生成する"""
+    return export_to_excel(df)
+
+
+@st.cache_resource
+def _report_executor() -> ThreadPoolExecutor:
+    """PDFレポート生成用のバックグラウンドスレッドプール（全セッションで共有）"""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="pdf-report")
+
+
+@st.cache_resource(show_spinner=False)
+def _warm_up_report_renderer():
+    """グラフ画像変換（kaleido）をバックグラウンドで事前に起動する（プロセス内で1回のみ）"""
+    # fpdf・kaleidoはレポート生成ページでのみ必要なため、初回使用時にインポートする
+    from src.pdf_generator import warm_up_chart_renderer
+    return _report_executor().submit(warm_up_chart_renderer)
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _train_predictor(_df: pd.DataFrame, df_sig: tuple) -> dict:
+    """
+    売上予測モデルを学習する（データセットのシグネチャが同じ場合は学習済みモデルを再利用）
+
+    Args:
+        _df: 学習に使用するDataFrame（キャッシュキーには含めない）
+        df_sig: データセットのシグネチャ
+
+    Returns:
+        dict: 学習済みモデル、日次データ、テストデータの予測結果、評価指標
+    """
+    # 予測モジュール（scikit-learnの評価指標を含む）は売上予測ページでのみ必要なため、初回使用時にインポートする
+    from src.predictor import SalesPredictor
+
+    predictor = SalesPredictor()
+    X, y, daily_df = predictor.prepare_data(_df)
+    X_train, X_test, y_train, y_test = predictor.train_test_split_temporal(X, y, test_size=0.2)
+    predictor.train(X_train, y_train)
+    y_test_pred = predictor.predict_from_features(X_test)
+    metrics = predictor.evaluate(y_test, y_test_pred)
+    return {
+        'predictor': predictor,
+        'daily_df': daily_df,
+        'X_train': X_train,
+        'X_test': X_test,
+        'y_test': y_test,
+        'y_test_pred': y_test_pred,
+        'metrics': metrics
+    }
 
 # ============================================================================
 # サイドバーナビゲーション
@@ -151,10 +348,10 @@ if page == "データアップロード":
                     st.error(f"サンプルデータが見つかりません: {sample_path}")
                 else:
                     with st.spinner("サンプルデータを読み込み中..."):
-                        df = load_csv(sample_path)
-                        df = clean_data(df)
+                        df, df_sig = _load_sample(sample_path, os.path.getmtime(sample_path))
                         st.session_state.data = df
-                        st.session_state.original_data = df.copy()
+                        st.session_state.data_sig = df_sig
+                        st.session_state.original_data = df
                         st.session_state.uploaded_files_count = 1
                         st.rerun()
             except DataValidationError as e:
@@ -167,16 +364,13 @@ if page == "データアップロード":
     if uploaded_files:
         try:
             with st.spinner("ファイルを読み込み中..."):
-                dfs = []
-                for uploaded_file in uploaded_files:
-                    df = load_csv(uploaded_file)
-                    dfs.append(df)
-
-                merged_df = merge_dataframes(dfs) if len(dfs) > 1 else dfs[0]
-                cleaned_df = clean_data(merged_df)
+                # UploadedFileはスレッドセーフではないため、バイト列を先に取り出してからパースする
+                contents = tuple((f.getvalue(), f.name) for f in uploaded_files)
+                cleaned_df, cleaned_sig = _load_uploads(contents)
 
                 st.session_state.data = cleaned_df
-                st.session_state.original_data = cleaned_df.copy()
+                st.session_state.data_sig = cleaned_sig
+                st.session_state.original_data = cleaned_df
                 st.session_state.uploaded_files_count = len(uploaded_files)
 
                 st.success(f"読み込み完了: {len(cleaned_df):,} 行 × {len(cleaned_df.columns)} 列")
@@ -191,7 +385,7 @@ if page == "データアップロード":
         col1, col2 = st.columns(2)
         with col1:
             try:
-                excel_data = export_to_excel(st.session_state.data)
+                excel_data = _excel_bytes(st.session_state.data_sig, st.session_state.data)
                 st.download_button(
                     label="Excelファイルをダウンロード",
                     data=excel_data,
@@ -210,33 +404,31 @@ elif page == "ダッシュボード":
         st.info("「データアップロード」ページからデータをアップロードしてください")
     else:
         df = st.session_state.data
+        sig = st.session_state.data_sig
 
         # KPI表示
         st.subheader("主要業績指標（KPI）")
+        kpis = _kpis(sig, df)
         kpi1, kpi2, kpi3, kpi4 = st.columns(4)
 
         with kpi1:
-            total_sales = df['Sales'].sum() if 'Sales' in df.columns else 0
-            st.metric("総売上", f"${total_sales:,.0f}")
+            st.metric("総売上", f"${kpis['total_sales']:,.0f}")
 
         with kpi2:
-            total_profit = df['Profit'].sum() if 'Profit' in df.columns else 0
-            st.metric("総利益", f"${total_profit:,.0f}")
+            st.metric("総利益", f"${kpis['total_profit']:,.0f}")
 
         with kpi3:
-            avg_margin = (total_profit / total_sales * 100) if total_sales > 0 else 0
-            st.metric("平均利益率", f"{avg_margin:.1f}%")
+            st.metric("平均利益率", f"{kpis['margin']:.1f}%")
 
         with kpi4:
-            total_orders = df['Order ID'].nunique() if 'Order ID' in df.columns else len(df)
-            st.metric("総注文数", f"{total_orders:,}")
+            st.metric("総注文数", f"{kpis['total_orders']:,}")
 
         st.markdown("---")
 
         # グラフ表示
         st.subheader("売上推移")
         try:
-            fig_trend = plot_sales_trend(df, period='monthly')
+            fig_trend = _cached_figure(sig, 'sales_trend', df, period='monthly')
             st.plotly_chart(fig_trend, use_container_width=True)
         except GraphGenerationError as e:
             st.error(f"{e}")
@@ -248,7 +440,7 @@ elif page == "ダッシュボード":
         with col1:
             st.subheader("顧客分析")
             try:
-                fig_customer = plot_customer_analysis(df)
+                fig_customer = _cached_figure(sig, 'customer_analysis', df)
                 st.plotly_chart(fig_customer, use_container_width=True)
             except GraphGenerationError as e:
                 st.error(f"{e}")
@@ -256,7 +448,7 @@ elif page == "ダッシュボード":
         with col2:
             st.subheader("地域別売上")
             try:
-                fig_region = plot_regional_sales(df)
+                fig_region = _cached_figure(sig, 'regional_sales', df)
                 st.plotly_chart(fig_region, use_container_width=True)
             except GraphGenerationError as e:
                 st.error(f"{e}")
@@ -266,7 +458,7 @@ elif page == "ダッシュボード":
         # 売上上位商品を横長表示
         st.subheader("売上上位商品")
         try:
-            fig_product = plot_product_ranking(df, top_n=10)
+            fig_product = _cached_figure(sig, 'product_ranking', df, top_n=10)
             st.plotly_chart(fig_product, use_container_width=True)
         except GraphGenerationError as e:
             st.error(f"{e}")
@@ -276,7 +468,7 @@ elif page == "ダッシュボード":
         # 前年同期比較を横長表示
         st.subheader("前年同期比較")
         try:
-            fig_yoy = plot_yoy_comparison(df)
+            fig_yoy = _cached_figure(sig, 'yoy_comparison', df)
             st.plotly_chart(fig_yoy, use_container_width=True)
         except GraphGenerationError as e:
             st.error(f"{e}")
@@ -301,22 +493,12 @@ elif page == "売上予測":
             if st.button("予測を実行", type="primary", use_container_width=True):
                 with st.spinner("モデルを学習中..."):
                     try:
-                        predictor = SalesPredictor()
-                        X, y, daily_df = predictor.prepare_data(st.session_state.data)
-                        X_train, X_test, y_train, y_test = predictor.train_test_split_temporal(X, y, test_size=0.2)
-                        predictor.train(X_train, y_train)
-                        y_test_pred = predictor.model.predict(X_test)
-                        metrics = predictor.evaluate(y_test, y_test_pred)
-                        future_df = predictor.predict(periods=selected_periods)
+                        df = st.session_state.data
+                        trained = _train_predictor(df, st.session_state.data_sig)
+                        future_df = trained['predictor'].predict(periods=selected_periods)
 
                         st.session_state.prediction_results = {
-                            'predictor': predictor,
-                            'daily_df': daily_df,
-                            'X_train': X_train,
-                            'X_test': X_test,
-                            'y_test': y_test,
-                            'y_test_pred': y_test_pred,
-                            'metrics': metrics,
+                            **trained,
                             'future_df': future_df,
                             'periods': selected_periods
                         }
@@ -346,10 +528,10 @@ elif page == "売上予測":
             train_df = daily_df.iloc[:train_size]
             test_df = daily_df.iloc[train_size:]
 
-            fig.add_trace(go.Scatter(x=train_df['Date'], y=train_df['Sales'], mode='lines', name='学習データ'))
-            fig.add_trace(go.Scatter(x=test_df['Date'], y=test_df['Sales'], mode='lines', name='テストデータ'))
-            fig.add_trace(go.Scatter(x=test_df['Date'], y=results['y_test_pred'], mode='lines', name='テスト予測', line=dict(dash='dot')))
-            fig.add_trace(go.Scatter(x=future_df['Date'], y=future_df['Predicted_Sales'], mode='lines', name='将来予測', line=dict(dash='dash')))
+            fig.add_trace(make_line_trace(train_df['Date'], train_df['Sales'], name='学習データ'))
+            fig.add_trace(make_line_trace(test_df['Date'], test_df['Sales'], name='テストデータ'))
+            fig.add_trace(make_line_trace(test_df['Date'], results['y_test_pred'], name='テスト予測', line=dict(dash='dot')))
+            fig.add_trace(make_line_trace(future_df['Date'], future_df['Predicted_Sales'], name='将来予測', line=dict(dash='dash')))
 
             fig.update_layout(template='plotly_dark', height=500)
             st.plotly_chart(fig, use_container_width=True)
@@ -363,6 +545,9 @@ elif page == "レポート生成":
     else:
         st.subheader("レポート設定")
 
+        # レポート生成ボタンが押される前にkaleidoの起動を済ませておく
+        _warm_up_report_renderer()
+
         col1, col2 = st.columns(2)
         with col1:
             report_title = st.text_input("レポートタイトル", value="売上分析レポート")
@@ -373,29 +558,31 @@ elif page == "レポート生成":
                         df = st.session_state.data
 
                         # サマリーデータ作成
+                        kpis = _kpis(st.session_state.data_sig, df)
                         summary_data = {
-                            'total_sales': df['Sales'].sum() if 'Sales' in df.columns else 0,
-                            'total_profit': df['Profit'].sum() if 'Profit' in df.columns else 0,
-                            'profit_margin': (df['Profit'].sum() / df['Sales'].sum() * 100) if 'Sales' in df.columns and df['Sales'].sum() > 0 else 0,
-                            'total_orders': df['Order ID'].nunique() if 'Order ID' in df.columns else len(df)
+                            'total_sales': kpis['total_sales'],
+                            'total_profit': kpis['total_profit'],
+                            'profit_margin': kpis['margin'],
+                            'total_orders': kpis['total_orders']
                         }
 
                         # グラフ生成（個別に生成して配列に追加）
                         from src.visualizer import plot_sales_trend, plot_product_ranking, plot_regional_sales
+                        aggregates = _plot_aggregates(st.session_state.data_sig, df)
 
                         # 月次売上推移
                         st.info("月次売上推移グラフを生成中...")
-                        fig_sales_trend = plot_sales_trend(df, period='monthly')
+                        fig_sales_trend = plot_sales_trend(df, period='monthly', aggregates=aggregates)
                         st.success(f"月次売上推移グラフ生成完了: {fig_sales_trend.layout.title.text}")
 
                         # 売上上位商品
                         st.info("売上上位商品グラフを生成中...")
-                        fig_product_ranking = plot_product_ranking(df, top_n=10)
+                        fig_product_ranking = plot_product_ranking(df, top_n=10, aggregates=aggregates)
                         st.success(f"売上上位商品グラフ生成完了: {fig_product_ranking.layout.title.text}")
 
                         # 地域別売上構成
                         st.info("地域別売上構成グラフを生成中...")
-                        fig_regional_sales = plot_regional_sales(df)
+                        fig_regional_sales = plot_regional_sales(df, aggregates=aggregates)
                         st.success(f"地域別売上構成グラフ生成完了: {fig_regional_sales.layout.title.text}")
 
                         charts = [
@@ -405,8 +592,7 @@ elif page == "レポート生成":
                         ]
 
                         # テーブルデータ
-                        product_sales = df.groupby('Product Name')['Sales'].sum().reset_index()
-                        top_products = product_sales.nlargest(10, 'Sales')
+                        top_products = _top_products(st.session_state.data_sig, df, top_n=10)
 
                         tables = [
                             (top_products, "売上上位10商品")
@@ -422,39 +608,61 @@ elif page == "レポート生成":
                             "売上上位商品に注力することで、さらなる収益向上が見込めます。"
                         ]
 
-                        # PDFレポート生成
+                        # PDFレポート生成（画面をブロックしないようバックグラウンドスレッドで実行）
+                        from src.pdf_generator import ModernPDFReport
+
                         pdf = ModernPDFReport()
                         pdf.report_title = report_title
 
-                        # 出力ディレクトリ作成
-                        os.makedirs("outputs/reports", exist_ok=True)
-
-                        output_path = f"outputs/reports/sales_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-                        pdf.generate_report(
-                            output_path=output_path,
-                            summary_data=summary_data,
-                            charts=charts,
-                            tables=tables,
-                            insights=insights
-                        )
+                        # ファイルを経由せずメモリ上に出力
+                        pdf_buffer = io.BytesIO()
+                        st.session_state.pdf_job = {
+                            'future': _report_executor().submit(
+                                pdf.generate_report,
+                                output_path=pdf_buffer,
+                                summary_data=summary_data,
+                                charts=charts,
+                                tables=tables,
+                                insights=insights
+                            ),
+                            'buffer': pdf_buffer,
+                            'file_name': f"{report_title}_{datetime.now().strftime('%Y%m%d')}.pdf"
+                        }
+                        st.session_state.pdf_report = None
 
-                        # ダウンロードボタン表示
-                        with open(output_path, "rb") as f:
-                            pdf_data = f.read()
+                    except Exception as e:
+                        st.error(f"レポート生成エラー: {e}")
+                        import traceback
+                        st.code(traceback.format_exc())
 
+            # バックグラウンドで生成中のレポートの状態確認
+            pdf_job = st.session_state.pdf_job
+            if pdf_job is not None:
+                if pdf_job['future'].done():
+                    st.session_state.pdf_job = None
+                    try:
+                        pdf_job['future'].result()
+                        st.session_state.pdf_report = (pdf_job['buffer'].getvalue(), pdf_job['file_name'])
                         st.success("PDFレポートを生成しました！")
-                        st.download_button(
-                            label="PDFレポートをダウンロード",
-                            data=pdf_data,
-                            file_name=f"{report_title}_{datetime.now().strftime('%Y%m%d')}.pdf",
-                            mime="application/pdf",
-                            use_container_width=True
-                        )
-
                     except Exception as e:
                         st.error(f"レポート生成エラー: {e}")
                         import traceback
                         st.code(traceback.format_exc())
+                else:
+                    st.info("PDFレポートを生成中...")
+                    time.sleep(REPORT_POLL_INTERVAL)
+                    st.rerun()
+
+            # ダウンロードボタン表示
+            if st.session_state.pdf_report is not None:
+                pdf_data, file_name = st.session_state.pdf_report
+                st.download_button(
+                    label="PDFレポートをダウンロード",
+                    data=pdf_data,
+                    file_name=file_name,
+                    mime="application/pdf",
+                    use_container_width=True
+                )
 
 # ----------------------------------------------------------------------------
 # データ確認ページ
@@ -477,7 +685,7 @@ elif page == "データ確認":
                 st.metric("期間（日数）", f"{date_range:,}")
         with col4:
             if 'Sales' in df.columns:
-                st.metric("総売上", f"${df['Sales'].sum():,.0f}")
+                st.metric("総売上", f"${_kpis(st.session_state.data_sig, df)['total_sales']:,.0f}")
 
         st.markdown("---")
 
@@ -487,4 +695,4 @@ elif page == "データ確認":
         st.markdown("---")
 
         st.subheader("統計情報")
-        st.dataframe(df.describe(), use_container_width=True)
+        st.dataframe(_describe(st.session_state.data_sig, df), use_container_width=True)
@@ -4,21 +4,106 @@
 CSV読込、複数ファイル統合、データクリーニング、フィルター機能を提供します。
 """
 
+import numpy as np
 import pandas as pd
 import logging
+import codecs
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 import os
 
+# Numbaは任意依存（未インストール時はpandasの処理にフォールバック）
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# PyArrowは任意依存（未インストール時はpandasのCエンジン・pd.concatにフォールバック）
+try:
+    import pyarrow as pa
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# charset-normalizerは任意依存（未インストール時はエンコーディングを順に試行）
+try:
+    from charset_normalizer import from_bytes
+    CHARSET_NORMALIZER_AVAILABLE = True
+except ImportError:
+    CHARSET_NORMALIZER_AVAILABLE = False
+
+# Copy-on-Writeを有効化（防御的なdf.copy()を不要にし、コピーは変更時にのみ発生させる）
+pd.options.mode.copy_on_write = True
+
 # ロガー設定
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # 定数定義
 MAX_FILE_SIZE_MB = 200
 REQUIRED_COLUMNS = ['Order Date', 'Sales', 'Profit', 'Product Name']
+# 必須カラムの存在判定用（集合演算で一括判定する）
+_REQUIRED_COLUMN_SET = frozenset(REQUIRED_COLUMNS)
 NUMERIC_COLUMNS = ['Sales', 'Profit', 'Quantity', 'Discount']
 DATE_COLUMNS = ['Order Date', 'Ship Date']
+# Superstore形式の日付（M/D/YYYY）
+DATE_FORMAT = '%m/%d/%Y'
+# カテゴリ型に変換するカラム（商品名・顧客名はグラフの集計キーとして使うため整数コードで集計する）
+CATEGORICAL_COLUMNS = [
+    'Category', 'Sub-Category', 'Region', 'Segment', 'Ship Mode', 'State', 'Country',
+    'Product Name', 'Customer Name'
+]
+
+# フィルターキー、対象カラム、ログ表示名の対応
+FILTER_COLUMNS = [
+    ('categories', 'Category', 'カテゴリ'),
+    ('sub_categories', 'Sub-Category', 'サブカテゴリ'),
+    ('regions', 'Region', '地域'),
+    ('segments', 'Segment', 'セグメント'),
+]
+
+# CSV読み込みで試行するエンコーディング（この順に試行）
+CSV_ENCODINGS = ['utf-8', 'shift-jis', 'cp932', 'euc-jp', 'iso-8859-1', 'latin1']
+# エンコーディング推定に使用する先頭バイト数
+ENCODING_SNIFF_BYTES = 65536
+# 推定されたエンコーディング（Pythonのコーデック名）から優先して試行するエンコーディングへの対応
+# デコードに失敗し得るエンコーディングのみを並べ替える。ここにない推定結果（cp1250等の誤推定を含む）は
+# 既定の順序のまま試行し、任意のバイト列をデコードできるiso-8859-1/latin1は常に最後に試行する
+ENCODING_FAMILIES = {
+    'utf-8': ['utf-8'],
+    'ascii': ['utf-8'],
+    'shift_jis': ['shift-jis', 'cp932'],
+    'cp932': ['shift-jis', 'cp932'],
+    'shift_jis_2004': ['shift-jis', 'cp932'],
+    'shift_jisx0213': ['shift-jis', 'cp932'],
+    'euc_jp': ['euc-jp'],
+}
+
+# 重複行判定のキー（Superstore形式の1行を一意に特定するカラム）
+DEDUP_KEY_COLUMNS = ['Row ID', 'Order ID', 'Product ID']
+
+# Excel出力のシート名
+EXCEL_SHEET_NAME = 'Sales Data'
+# Excel出力の日時の表示形式（列幅はこの表示形式の文字数から求める）
+EXCEL_DATETIME_FORMAT = 'yyyy-mm-dd hh:mm:ss'
+# Excel出力で一度にPythonオブジェクトへ変換する行数
+EXCEL_WRITE_CHUNK_ROWS = 10_000
+
+# Numbaカーネルを使用する最小行数（これ未満ではJITのオーバーヘッドが上回る）
+NUMBA_MIN_ROWS = 100_000
+
+# 外れ値判定の99パーセンタイルを厳密に計算する最大件数（超える場合は等間隔サンプルから推定）
+QUANTILE_EXACT_MAX_ROWS = 100_000
+
+# CSV読込時に指定する既知カラムの型（Superstore形式）
+# 金額系はfloat64で読み込む（float32への圧縮はclean_dataでlow_memory=Trueを指定した場合のみ）
+CSV_DTYPES = {
+    'Sales': 'float64',
+    'Profit': 'float64',
+    'Discount': 'float64',
+    'Quantity': 'int32',
+    **{col: 'category' for col in CATEGORICAL_COLUMNS}
+}
 
 
 class DataValidationError(Exception):
@@ -43,10 +128,10 @@ def validate_file_size(file) -> Tuple[bool, Optional[str]]:
                 return False, f"ファイルサイズが大きすぎます（{size_mb:.1f}MB）。{MAX_FILE_SIZE_MB}MB以下のファイルをアップロードしてください。"
             elif size_mb == 0:
                 return False, "空のファイルです。データが含まれるファイルをアップロードしてください。"
-            logger.info(f"ファイルサイズチェック: {size_mb:.2f}MB")
+            logger.info("ファイルサイズチェック: %.2fMB", size_mb)
         return True, None
     except Exception as e:
-        logger.error(f"ファイルサイズチェックエラー: {e}")
+        logger.error("ファイルサイズチェックエラー: %s", e)
         return True, None  # エラー時は処理を続行
 
 
@@ -67,7 +152,7 @@ def validate_file_extension(file) -> Tuple[bool, Optional[str]]:
                 return False, f"CSVファイルのみ対応しています。アップロードされたファイル: {file.name}"
         return True, None
     except Exception as e:
-        logger.error(f"ファイル拡張子チェックエラー: {e}")
+        logger.error("ファイル拡張子チェックエラー: %s", e)
         return True, None
 
 
@@ -81,9 +166,11 @@ def validate_required_columns(df: pd.DataFrame) -> Tuple[bool, Optional[str]]:
     Returns:
         Tuple[bool, Optional[str]]: (有効かどうか, エラーメッセージ)
     """
-    missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    missing = _REQUIRED_COLUMN_SET.difference(df.columns)
 
-    if missing_columns:
+    if missing:
+        # エラーメッセージは不足時のみ作成し、カラムはREQUIRED_COLUMNSの順に並べる
+        missing_columns = [col for col in REQUIRED_COLUMNS if col in missing]
         error_msg = f"❌ このCSVファイルは対応していない形式です。\n\n"
         error_msg += f"必須カラムが不足しています:\n"
         error_msg += "\n".join([f"  - {col}" for col in missing_columns])
@@ -93,10 +180,50 @@ def validate_required_columns(df: pd.DataFrame) -> Tuple[bool, Optional[str]]:
         error_msg += f"\n\nこのダッシュボードは売上データ（Superstore形式）専用です。\n正しい形式のCSVファイルをアップロードしてください。"
         return False, error_msg
 
-    logger.info(f"必須カラムチェック: すべて存在 ({', '.join(REQUIRED_COLUMNS)})")
+    logger.info("必須カラムチェック: すべて存在 (%s)", ', '.join(REQUIRED_COLUMNS))
     return True, None
 
 
+def _parse_date_column(series: pd.Series) -> pd.Series:
+    """
+    日付カラムをdatetime型に変換する
+
+    既定の形式（DATE_FORMAT）で一括パースし、形式が一致しない値がある場合のみ
+    形式推論でパースし直す。既にdatetime型の場合はそのまま返す。
+
+    Args:
+        series: 日付カラム
+
+    Returns:
+        pd.Series: datetime型に変換されたSeries（不正な値はNaT）
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+
+    parsed = pd.to_datetime(series, format=DATE_FORMAT, errors='coerce')
+    if parsed.isnull().sum() > series.isnull().sum():
+        parsed = pd.to_datetime(series, errors='coerce')
+    return parsed
+
+
+def _approx_quantile(values: np.ndarray, q: float) -> float:
+    """
+    分位点を計算する（大きな配列は等間隔に抽出したサンプルから推定する）
+
+    QUANTILE_EXACT_MAX_ROWS件以下の場合は厳密に計算する。
+
+    Args:
+        values: 欠損を含まない数値の配列
+        q: 分位（0～1）
+
+    Returns:
+        float: 分位点
+    """
+    if values.size > QUANTILE_EXACT_MAX_ROWS:
+        values = values[::values.size // QUANTILE_EXACT_MAX_ROWS]
+    return float(np.quantile(values, q))
+
+
 def validate_data_types(df: pd.DataFrame) -> List[str]:
     """
     データ型をチェックし、警告メッセージのリストを返す
@@ -109,42 +236,45 @@ def validate_data_types(df: pd.DataFrame) -> List[str]:
     """
     warnings = []
 
-    # 日付カラムのチェック
+    # 日付カラムのチェック（変換後のndarrayに対して欠損・未来日付を判定）
+    now = np.datetime64(datetime.now(), 'ns')
     for col in DATE_COLUMNS:
         if col in df.columns:
             try:
-                parsed = pd.to_datetime(df[col], errors='coerce')
-                null_count = parsed.isnull().sum()
+                values = _parse_date_column(df[col]).to_numpy(dtype='datetime64[ns]')
+                null_count = int(np.count_nonzero(np.isnat(values)))
                 if null_count > 0:
                     warnings.append(f"⚠️ '{col}': {null_count}個の日付が不正な形式です")
 
-                # 未来の日付チェック
+                # 未来の日付チェック（NaTとの比較はFalseになる）
                 if col == 'Order Date':
-                    future_dates = (parsed > datetime.now()).sum()
+                    future_dates = int(np.count_nonzero(values > now))
                     if future_dates > 0:
                         warnings.append(f"⚠️ '{col}': {future_dates}個の未来の日付があります")
             except Exception as e:
                 warnings.append(f"❌ '{col}': 日付変換エラー ({str(e)})")
 
-    # 数値カラムのチェック
+    # 数値カラムのチェック（1回変換したndarrayから欠損・負の値・外れ値をまとめて判定）
     for col in NUMERIC_COLUMNS:
         if col in df.columns:
             try:
-                numeric_data = pd.to_numeric(df[col], errors='coerce')
-                null_count = numeric_data.isnull().sum()
+                values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+                nan_mask = np.isnan(values)
+                null_count = int(np.count_nonzero(nan_mask))
                 if null_count > 0:
                     warnings.append(f"⚠️ '{col}': {null_count}個の値が数値に変換できません")
+                valid = values[~nan_mask] if null_count > 0 else values
 
                 # 負の値チェック（SalesとQuantity）
                 if col in ['Sales', 'Quantity']:
-                    negative_count = (numeric_data < 0).sum()
+                    negative_count = int(np.count_nonzero(valid < 0))
                     if negative_count > 0:
                         warnings.append(f"⚠️ '{col}': {negative_count}個の負の値があります")
 
                 # 極端に大きい値（外れ値）チェック
-                if not numeric_data.empty:
-                    q99 = numeric_data.quantile(0.99)
-                    outliers = (numeric_data > q99 * 100).sum()  # 99パーセンタイルの100倍以上
+                if valid.size > 0:
+                    q99 = _approx_quantile(valid, 0.99)
+                    outliers = int(np.count_nonzero(valid > q99 * 100))  # 99パーセンタイルの100倍以上
                     if outliers > 0:
                         warnings.append(f"⚠️ '{col}': {outliers}個の極端に大きい値（外れ値）があります")
             except Exception as e:
@@ -153,6 +283,24 @@ def validate_data_types(df: pd.DataFrame) -> List[str]:
     return warnings
 
 
+def _missing_summary(df: pd.DataFrame) -> Dict[str, int]:
+    """
+    欠損値を含むカラムとその欠損値数を集計する
+
+    Args:
+        df: 対象のDataFrame
+
+    Returns:
+        Dict[str, int]: カラム名と欠損値数（欠損値のないカラムは含まない）
+    """
+    summary = {}
+    for col in df.columns:
+        count = int(df[col].isna().sum())
+        if count > 0:
+            summary[col] = count
+    return summary
+
+
 def validate_missing_values(df: pd.DataFrame) -> List[str]:
     """
     欠損値をチェックし、警告メッセージのリストを返す
@@ -164,16 +312,15 @@ def validate_missing_values(df: pd.DataFrame) -> List[str]:
         List[str]: 警告メッセージのリスト
     """
     warnings = []
-    missing_summary = df.isnull().sum()
-    missing_summary = missing_summary[missing_summary > 0]
+    missing_summary = _missing_summary(df)
 
-    if not missing_summary.empty:
+    if missing_summary:
         total_rows = len(df)
         for col, count in missing_summary.items():
             percentage = (count / total_rows) * 100
 
             # 重要カラムの欠損
-            if col in REQUIRED_COLUMNS:
+            if col in _REQUIRED_COLUMN_SET:
                 warnings.append(f"❌ '{col}' (重要): {count}個の欠損値 ({percentage:.1f}%)")
             # 欠損率が50%超える場合
             elif percentage > 50:
@@ -203,10 +350,116 @@ def validate_data_completeness(df: pd.DataFrame) -> Tuple[bool, Optional[str]]:
     if len(df) < 10:
         return False, f"データ行数が少なすぎます（{len(df)}行）。少なくとも10行以上のデータが必要です。"
 
-    logger.info(f"データ完全性チェック: {len(df)}行, {len(df.columns)}列")
+    logger.info("データ完全性チェック: %d行, %d列", len(df), len(df.columns))
     return True, None
 
 
+def _convert_categorical(df: pd.DataFrame, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    低カーディナリティの文字列カラムをカテゴリ型に変換する（DataFrameを直接更新）
+
+    既にカテゴリ型のカラムは変換しない。カテゴリ型にしておくことで、apply_filtersのisinは
+    カテゴリ（辞書）との照合と整数コードの比較になり、groupbyも整数コード上で集計される。
+
+    Args:
+        df: 対象のDataFrame
+        columns: 変換対象のカラム（省略時はCATEGORICAL_COLUMNS）
+
+    Returns:
+        pd.DataFrame: 変換後のDataFrame（引数と同じオブジェクト）
+    """
+    for col in CATEGORICAL_COLUMNS if columns is None else columns:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    return df
+
+
+def _read_csv(file, encoding: str) -> pd.DataFrame:
+    """
+    既知カラムの型を指定してCSVを読み込む
+
+    PyArrowエンジン（マルチスレッド、未インストール時はCエンジン）で読み込む。
+    型指定に失敗した場合は型指定なしの読み込みにフォールバックする。
+
+    Args:
+        file: ファイルオブジェクトまたはファイルパス
+        encoding: 文字エンコーディング
+
+    Returns:
+        pd.DataFrame: 読み込まれたデータフレーム
+
+    Raises:
+        UnicodeError: 指定エンコーディングでデコードできない場合
+    """
+    # ヘッダー行のみ読み込み、存在するカラムに限定して型を指定する
+    columns = pd.read_csv(file, encoding=encoding, nrows=0).columns
+    dtype = {col: t for col, t in CSV_DTYPES.items() if col in columns}
+    parse_dates = [col for col in DATE_COLUMNS if col in columns]
+
+    try:
+        if hasattr(file, 'seek'):
+            file.seek(0)
+        engine = 'pyarrow' if PYARROW_AVAILABLE else 'c'
+        df = pd.read_csv(file, encoding=encoding, engine=engine, dtype=dtype, parse_dates=parse_dates)
+    except (UnicodeDecodeError, UnicodeError):
+        raise
+    except Exception as e:
+        logger.warning("型指定付きの読み込みに失敗したため型指定なしで再試行します: %s", e)
+        if hasattr(file, 'seek'):
+            file.seek(0)
+        return pd.read_csv(file, encoding=encoding)
+
+    # PyArrowはUTF-8として不正なバイト列をbytes型のまま返すため、デコード失敗として扱う
+    # （カテゴリ型のカラムはカテゴリ（辞書）側に格納される）
+    for col in df.select_dtypes(include=['object', 'category']).columns:
+        series = df[col]
+        values = series.cat.categories if isinstance(series.dtype, pd.CategoricalDtype) else series
+        if len(values) > 0 and isinstance(values[0], bytes):
+            raise UnicodeError(f"'{col}'を{encoding}でデコードできません")
+
+    return df
+
+
+def _sniff_encodings(file) -> List[str]:
+    """
+    先頭バイトからエンコーディングを推定し、試行するエンコーディングの順序を決める
+
+    推定結果がENCODING_FAMILIESにある場合のみ対応するエンコーディングを先頭に並べ、残りは既定の順序で続ける。
+    それ以外の推定結果や推定できない場合は既定の順序（CSV_ENCODINGS）をそのまま返す。
+
+    Args:
+        file: ファイルオブジェクトまたはファイルパス
+
+    Returns:
+        List[str]: 試行するエンコーディングのリスト
+    """
+    if not CHARSET_NORMALIZER_AVAILABLE:
+        return list(CSV_ENCODINGS)
+
+    try:
+        if isinstance(file, str):
+            with open(file, 'rb') as f:
+                head = f.read(ENCODING_SNIFF_BYTES)
+        else:
+            file.seek(0)
+            head = file.read(ENCODING_SNIFF_BYTES)
+            file.seek(0)
+        best = from_bytes(head).best()
+    except Exception as e:
+        logger.warning("エンコーディング推定に失敗しました: %s", e)
+        return list(CSV_ENCODINGS)
+
+    if best is None:
+        return list(CSV_ENCODINGS)
+
+    detected = codecs.lookup(best.encoding).name
+    logger.info("エンコーディング推定結果: %s", detected)
+    preferred = ENCODING_FAMILIES.get(detected)
+    if preferred is None:
+        return list(CSV_ENCODINGS)
+    return preferred + [encoding for encoding in CSV_ENCODINGS if encoding not in preferred]
+
+
 def load_csv(file) -> pd.DataFrame:
     """
     CSVファイルを読み込みDataFrameを返す（バリデーション付き）
@@ -238,17 +491,18 @@ def load_csv(file) -> pd.DataFrame:
         # ファイルパスの場合はファイル存在チェック
         if not os.path.exists(file):
             raise DataValidationError(f"ファイルが見つかりません: {file}")
-        logger.info(f"ファイルパスからCSV読み込み: {file}")
+        logger.info("ファイルパスからCSV読み込み: %s", file)
 
-    # 3. CSV読み込み（複数エンコーディング試行）
-    encodings = ['utf-8', 'shift-jis', 'cp932', 'iso-8859-1', 'latin1']
+    # 3. CSV読み込み（推定したエンコーディングを優先し、失敗した場合は他のエンコーディングを試行）
+    encodings = _sniff_encodings(file)
+    last_error = None
 
     for encoding in encodings:
         try:
             if hasattr(file, 'seek'):
                 file.seek(0)  # ファイルポインタを先頭に戻す
-            df = pd.read_csv(file, encoding=encoding)
-            logger.info(f"CSVファイル読み込み成功（{encoding}）: {len(df)}行, {len(df.columns)}列")
+            df = _read_csv(file, encoding)
+            logger.info("CSVファイル読み込み成功（%s）: %d行, %d列", encoding, len(df), len(df.columns))
 
             # 4. データ完全性チェック
             is_valid, error_msg = validate_data_completeness(df)
@@ -268,12 +522,16 @@ def load_csv(file) -> pd.DataFrame:
         except pd.errors.EmptyDataError:
             raise DataValidationError("空のCSVファイルです。データが含まれるファイルをアップロードしてください。")
         except Exception as e:
-            logger.error(f"CSVファイル読み込み失敗（{encoding}）: {e}")
+            logger.error("CSVファイル読み込み失敗（%s）: %s", encoding, e)
+            last_error = e
             continue
 
     # すべてのエンコーディングで失敗した場合
     logger.error("すべてのエンコーディングでCSV読み込みに失敗しました")
-    raise ValueError(f"ファイルの読み込みに失敗しました。対応エンコーディング: {', '.join(encodings)}")
+    message = f"ファイルの読み込みに失敗しました。対応エンコーディング: {', '.join(CSV_ENCODINGS)}"
+    if last_error is not None:
+        message += f"\n最後のエラー: {last_error}"
+    raise ValueError(message)
 
 
 def merge_dataframes(dfs: List[pd.DataFrame]) -> pd.DataFrame:
@@ -285,6 +543,9 @@ def merge_dataframes(dfs: List[pd.DataFrame]) -> pd.DataFrame:
 
     Returns:
         pd.DataFrame: 統合されたDataFrame
+
+    Raises:
+        DataValidationError: ファイル間でカラム構成が一致しない場合
     """
     if not dfs:
         raise ValueError("統合するDataFrameが指定されていません")
@@ -293,73 +554,236 @@ def merge_dataframes(dfs: List[pd.DataFrame]) -> pd.DataFrame:
         logger.info("DataFrameは1つのみです（統合不要）")
         return dfs[0]
 
-    # 複数DataFrameを縦方向に統合
-    merged_df = pd.concat(dfs, ignore_index=True)
+    # カラム構成の一致を事前に確認（暗黙のスキーマ拡張を避ける）
+    base_columns = list(dfs[0].columns)
+    for i, df in enumerate(dfs[1:], start=2):
+        if set(df.columns) != set(base_columns):
+            missing = sorted(set(base_columns) - set(df.columns))
+            extra = sorted(set(df.columns) - set(base_columns))
+            raise DataValidationError(
+                f"{i}番目のファイルのカラム構成が1番目のファイルと一致しません。\n"
+                f"不足カラム: {', '.join(missing) or 'なし'}\n"
+                f"余分なカラム: {', '.join(extra) or 'なし'}"
+            )
+
+    merged_df = None
+    if PYARROW_AVAILABLE:
+        # Arrowテーブルとして連結し（バッファはコピーせずチャンクとして保持）、最後に1回だけpandasへ変換
+        try:
+            tables = [pa.Table.from_pandas(df[base_columns], preserve_index=False) for df in dfs]
+            merged_df = pa.concat_tables(tables, promote_options='permissive').to_pandas()
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            # 型指定なしで読み込まれたファイルを含む場合など、カラムの型がファイル間で異なる場合はpd.concatで統合する
+            logger.warning("Arrowでの統合に失敗したためpd.concatで統合します: %s", e)
 
-    logger.info(f"DataFrames統合完了: {len(dfs)}個 → {len(merged_df)}行, {len(merged_df.columns)}列")
+    if merged_df is None:
+        merged_df = pd.concat([df[base_columns] for df in dfs], ignore_index=True)
+
+    logger.info("DataFrames統合完了: %d個 → %d行, %d列", len(dfs), len(merged_df), len(merged_df.columns))
 
     return merged_df
 
 
-def clean_data(df: pd.DataFrame) -> pd.DataFrame:
+def clean_data(df: pd.DataFrame, low_memory: bool = False) -> pd.DataFrame:
     """
     データクリーニングを実行する
 
     Args:
         df: クリーニング対象のDataFrame
+        low_memory: Trueの場合、金額系カラムをfloat32、数量を最小の整数型に圧縮する
+            （float32では合計やExcel出力の値に丸め誤差が出るため、既定はFalseでfloat64のまま保持する）
 
     Returns:
         pd.DataFrame: クリーニング済みDataFrame
-    """
-    df = df.copy()
 
+    Note:
+        入力DataFrameは呼び出し側が所有している前提で、コピーせずにカラムを置き換える。
+    """
     # 1. 日付カラムのパース
-    date_columns = ['Order Date', 'Ship Date']
-    for col in date_columns:
+    for col in DATE_COLUMNS:
         if col in df.columns:
-            df[col] = pd.to_datetime(df[col], errors='coerce')
+            df[col] = _parse_date_column(df[col])
             null_count = df[col].isnull().sum()
             if null_count > 0:
-                logger.warning(f"{col}に{null_count}個の不正な日付があります")
+                logger.warning("%sに%d個の不正な日付があります", col, null_count)
+
+    # 2. 欠損値チェック・レポート（警告が出力されないログレベルでは集計自体を省略）
+    if logger.isEnabledFor(logging.WARNING):
+        missing_summary = _missing_summary(df)
+
+        if missing_summary:
+            total_rows = len(df)
+            logger.warning("欠損値が検出されました:")
+            for col, count in missing_summary.items():
+                percentage = (count / total_rows) * 100
+                logger.warning("  - %s: %d個 (%.2f%%)", col, count, percentage)
+
+                # 欠損率が50%を超える場合は強い警告
+                if percentage > 50:
+                    logger.error("  ⚠️ %sの欠損率が50%%を超えています！", col)
+
+    # 3. 数値カラムの型変換（型指定付き読み込みで数値型になっていないカラムのみ、まとめて1回で変換）
+    numeric_columns = [
+        col for col in NUMERIC_COLUMNS
+        if col in df.columns and not pd.api.types.is_numeric_dtype(df[col])
+    ]
+    if numeric_columns:
+        df[numeric_columns] = df[numeric_columns].apply(pd.to_numeric, errors='coerce')
+
+    # 異常値チェック（負の売上など）
+    negative_columns = [col for col in ['Sales', 'Quantity'] if col in df.columns]
+    if negative_columns:
+        negative_counts = (df[negative_columns].to_numpy() < 0).sum(axis=0)
+        for col, negative_count in zip(negative_columns, negative_counts):
+            if negative_count > 0:
+                logger.warning("%sに%d個の負の値があります", col, negative_count)
+
+    # 4. データ型の圧縮（集計・フィルター時のメモリ帯域を削減）
+    if low_memory:
+        for col in ['Sales', 'Profit', 'Discount']:
+            if col in df.columns:
+                df[col] = df[col].astype(np.float32)
+        if 'Quantity' in df.columns:
+            df['Quantity'] = pd.to_numeric(df['Quantity'], downcast='integer')
+
+    _convert_categorical(df)
+
+    # 5. 重複行の削除（キーカラムがすべて揃っている場合はキーのみで判定し、全カラムのハッシュを避ける）
+    duplicates_before = len(df)
+    if all(col in df.columns for col in DEDUP_KEY_COLUMNS):
+        logger.info("重複判定キー: %s", ', '.join(DEDUP_KEY_COLUMNS))
+        df = df.drop_duplicates(subset=DEDUP_KEY_COLUMNS, ignore_index=True)
+    else:
+        logger.info("重複判定キー: 全カラム")
+        df = df.drop_duplicates(ignore_index=True)
+    duplicates_removed = duplicates_before - len(df)
 
-    # 2. 欠損値チェック・レポート
-    missing_summary = df.isnull().sum()
-    missing_summary = missing_summary[missing_summary > 0]
+    if duplicates_removed > 0:
+        logger.info("重複行を%d個削除しました", duplicates_removed)
 
-    if not missing_summary.empty:
-        total_rows = len(df)
-        logger.warning("欠損値が検出されました:")
-        for col, count in missing_summary.items():
-            percentage = (count / total_rows) * 100
-            logger.warning(f"  - {col}: {count}個 ({percentage:.2f}%)")
+    logger.info("データクリーニング完了: %d行, %d列", len(df), len(df.columns))
+
+    return df
 
-            # 欠損率が50%を超える場合は強い警告
-            if percentage > 50:
-                logger.error(f"  ⚠️ {col}の欠損率が50%を超えています！")
 
-    # 3. 数値カラムの型変換
-    numeric_columns = ['Sales', 'Profit', 'Quantity', 'Discount']
-    for col in numeric_columns:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+def _filter_mask_pandas(df: pd.DataFrame, start_date, end_date, conditions: List[Tuple[str, list]]) -> np.ndarray:
+    """
+    pandasの比較演算でフィルター条件のブールマスクを作成する
 
-            # 異常値チェック（負の売上など）
-            if col in ['Sales', 'Quantity']:
-                negative_count = (df[col] < 0).sum()
-                if negative_count > 0:
-                    logger.warning(f"{col}に{negative_count}個の負の値があります")
+    Args:
+        df: フィルタリング対象のDataFrame
+        start_date: 開始日（pd.Timestamp、Noneの場合は下限なし）
+        end_date: 終了日（pd.Timestamp、Noneの場合は上限なし）
+        conditions: (カラム名, 許可する値のリスト) のリスト
 
-    # 4. 重複行の削除
-    duplicates_before = len(df)
-    df = df.drop_duplicates()
-    duplicates_removed = duplicates_before - len(df)
+    Returns:
+        np.ndarray: 行ごとのブールマスク
+    """
+    masks = []
 
-    if duplicates_removed > 0:
-        logger.info(f"重複行を{duplicates_removed}個削除しました")
+    if start_date is not None or end_date is not None:
+        dates = df['Order Date'].to_numpy()
+        if start_date is not None:
+            masks.append(dates >= start_date.to_datetime64())
+        if end_date is not None:
+            masks.append(dates <= end_date.to_datetime64())
 
-    logger.info(f"データクリーニング完了: {len(df)}行, {len(df.columns)}列")
+    # カテゴリ型のカラムではisinはカテゴリ（辞書）側で照合し、整数コードの比較で判定される
+    for col, values in conditions:
+        masks.append(df[col].isin(values).to_numpy())
 
-    return df
+    if not masks:
+        return np.ones(len(df), dtype=bool)
+    return np.logical_and.reduce(masks)
+
+
+# NaTのint64表現（日付フィルター適用時は常に除外する）
+_NAT_INT64 = np.iinfo(np.int64).min
+
+
+def _filter_mask_kernel(n, dates, use_dates, start_ns, end_ns, codes, allowed):
+    """
+    日付範囲とカテゴリコードの判定を1回の並列ループで行うカーネル
+
+    Args:
+        n: 行数
+        dates: 日付（int64ナノ秒）の配列
+        use_dates: 日付範囲で判定するかどうか
+        start_ns: 開始日時（int64ナノ秒）
+        end_ns: 終了日時（int64ナノ秒）
+        codes: (条件数, 行数) のカテゴリコード配列
+        allowed: (条件数, カテゴリ数) の許可フラグ配列
+
+    Returns:
+        np.ndarray: 行ごとのブールマスク
+    """
+    mask = np.ones(n, dtype=np.bool_)
+    for i in prange(n):
+        if use_dates:
+            d = dates[i]
+            if d == _NAT_INT64 or d < start_ns or d > end_ns:
+                mask[i] = False
+                continue
+        for j in range(codes.shape[0]):
+            code = codes[j, i]
+            if code < 0 or not allowed[j, code]:
+                mask[i] = False
+                break
+    return mask
+
+
+if NUMBA_AVAILABLE:
+    _filter_mask_kernel = njit(parallel=True, cache=True)(_filter_mask_kernel)
+
+
+def _can_use_numba_filter(df: pd.DataFrame, start_date, end_date, conditions: List[Tuple[str, list]]) -> bool:
+    """
+    Numbaカーネルでフィルターマスクを作成できるかを判定する
+
+    カテゴリ型のカラムと datetime64[ns] の日付カラムのみ対応する。
+    """
+    if not NUMBA_AVAILABLE or len(df) < NUMBA_MIN_ROWS:
+        return False
+    if (start_date is not None or end_date is not None) and df['Order Date'].dtype != 'datetime64[ns]':
+        return False
+    return all(isinstance(df[col].dtype, pd.CategoricalDtype) for col, _ in conditions)
+
+
+def _filter_mask_numba(df: pd.DataFrame, start_date, end_date, conditions: List[Tuple[str, list]]) -> np.ndarray:
+    """
+    Numbaカーネルでフィルター条件のブールマスクを作成する
+
+    カテゴリ型カラムの整数コードと、許可する値のコードを引くための
+    ルックアップ配列を渡し、文字列比較を行わずに判定する。
+
+    Args:
+        df: フィルタリング対象のDataFrame
+        start_date: 開始日（pd.Timestamp、Noneの場合は下限なし）
+        end_date: 終了日（pd.Timestamp、Noneの場合は上限なし）
+        conditions: (カラム名, 許可する値のリスト) のリスト
+
+    Returns:
+        np.ndarray: 行ごとのブールマスク
+    """
+    n = len(df)
+
+    use_dates = start_date is not None or end_date is not None
+    if use_dates:
+        dates = df['Order Date'].to_numpy().view(np.int64)
+    else:
+        dates = np.empty(0, dtype=np.int64)
+    start_ns = start_date.value if start_date is not None else np.iinfo(np.int64).min + 1
+    end_ns = end_date.value if end_date is not None else np.iinfo(np.int64).max
+
+    max_categories = max((len(df[col].cat.categories) for col, _ in conditions), default=0)
+    codes = np.empty((len(conditions), n), dtype=np.int32)
+    allowed = np.zeros((len(conditions), max(max_categories, 1)), dtype=np.bool_)
+    for j, (col, values) in enumerate(conditions):
+        codes[j] = df[col].cat.codes.to_numpy()
+        indexer = df[col].cat.categories.get_indexer(values)
+        allowed[j, indexer[indexer >= 0]] = True
+
+    return _filter_mask_kernel(n, dates, use_dates, start_ns, end_ns, codes, allowed)
 
 
 def apply_filters(df: pd.DataFrame, filters: Dict[str, Any]) -> pd.DataFrame:
@@ -377,53 +801,82 @@ def apply_filters(df: pd.DataFrame, filters: Dict[str, Any]) -> pd.DataFrame:
     Returns:
         pd.DataFrame: フィルタリング済みDataFrame
     """
-    filtered_df = df.copy()
-    initial_rows = len(filtered_df)
+    initial_rows = len(df)
 
     # 1. 日付範囲フィルター
+    start_date = end_date = None
     if 'date_range' in filters and filters['date_range']:
-        start_date, end_date = filters['date_range']
-        if 'Order Date' in filtered_df.columns:
-            if start_date:
-                filtered_df = filtered_df[filtered_df['Order Date'] >= pd.to_datetime(start_date)]
-            if end_date:
-                filtered_df = filtered_df[filtered_df['Order Date'] <= pd.to_datetime(end_date)]
-            logger.info(f"日付範囲フィルター適用: {start_date} ～ {end_date}")
-
-    # 2. カテゴリフィルター
-    if 'categories' in filters and filters['categories']:
-        if 'Category' in filtered_df.columns:
-            filtered_df = filtered_df[filtered_df['Category'].isin(filters['categories'])]
-            logger.info(f"カテゴリフィルター適用: {filters['categories']}")
-
-    # 3. サブカテゴリフィルター
-    if 'sub_categories' in filters and filters['sub_categories']:
-        if 'Sub-Category' in filtered_df.columns:
-            filtered_df = filtered_df[filtered_df['Sub-Category'].isin(filters['sub_categories'])]
-            logger.info(f"サブカテゴリフィルター適用: {filters['sub_categories']}")
-
-    # 4. 地域フィルター
-    if 'regions' in filters and filters['regions']:
-        if 'Region' in filtered_df.columns:
-            filtered_df = filtered_df[filtered_df['Region'].isin(filters['regions'])]
-            logger.info(f"地域フィルター適用: {filters['regions']}")
-
-    # 5. セグメントフィルター
-    if 'segments' in filters and filters['segments']:
-        if 'Segment' in filtered_df.columns:
-            filtered_df = filtered_df[filtered_df['Segment'].isin(filters['segments'])]
-            logger.info(f"セグメントフィルター適用: {filters['segments']}")
+        if 'Order Date' in df.columns:
+            start_date, end_date = filters['date_range']
+            logger.info("日付範囲フィルター適用: %s ～ %s", start_date, end_date)
+            # 日付の変換は1回だけ行い、以降のマスク作成では変換済みの値を使う
+            start_date = pd.Timestamp(start_date) if start_date else None
+            end_date = pd.Timestamp(end_date) if end_date else None
+
+    # 2.～5. カテゴリ・サブカテゴリ・地域・セグメントフィルター
+    conditions = []
+    for key, col, label in FILTER_COLUMNS:
+        if key in filters and filters[key]:
+            if col in df.columns:
+                conditions.append((col, filters[key]))
+                logger.info("%sフィルター適用: %s", label, filters[key])
+
+    # 各フィルターの条件を1つのブールマスクに集約し、最後に1回だけ抽出する
+    if _can_use_numba_filter(df, start_date, end_date, conditions):
+        mask = _filter_mask_numba(df, start_date, end_date, conditions)
+    else:
+        mask = _filter_mask_pandas(df, start_date, end_date, conditions)
+
+    filtered_df = df.loc[mask]
 
     final_rows = len(filtered_df)
-    logger.info(f"フィルタリング完了: {initial_rows}行 → {final_rows}行 ({final_rows/initial_rows*100:.1f}%)")
+    logger.info("フィルタリング完了: %d行 → %d行 (%.1f%%)", initial_rows, final_rows, final_rows / initial_rows * 100)
 
     return filtered_df
 
 
+def _excel_column_widths(df: pd.DataFrame) -> np.ndarray:
+    """
+    Excel出力時の列幅（ヘッダー・値の最大文字数 + 2、最大50文字）をカラムごとに計算する
+
+    カテゴリ型のカラムは行ごとではなく、カテゴリ（辞書）の文字列長のみから求める。
+    日時型のカラムはセルに表示される書式（EXCEL_DATETIME_FORMAT）の文字数を用いる。
+
+    Args:
+        df: Excel出力するDataFrame
+
+    Returns:
+        np.ndarray: カラムごとの列幅
+    """
+    value_lengths = np.zeros(len(df.columns), dtype=np.int64)
+    if len(df) > 0:
+        for idx, col in enumerate(df.columns):
+            series = df[col]
+            if pd.api.types.is_datetime64_any_dtype(series):
+                if series.notna().any():
+                    value_lengths[idx] = len(EXCEL_DATETIME_FORMAT)
+                continue
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                values = series.cat.categories.astype(str)
+                if series.hasnans:
+                    values = values.append(pd.Index(['nan']))
+            else:
+                values = series.astype(str)
+            if len(values) > 0:
+                value_lengths[idx] = values.str.len().max()
+
+    header_lengths = np.array([len(str(col)) for col in df.columns], dtype=np.int64)
+    return np.minimum(np.maximum(value_lengths, header_lengths) + 2, 50)
+
+
 def export_to_excel(df: pd.DataFrame) -> bytes:
     """
     DataFrameをExcelファイル（バイナリ）に変換する
 
+    xlsxwriterのconstant_memoryモードで行単位に書き出すため、
+    ワークブック全体をメモリ上に保持しない。セルの値はEXCEL_WRITE_CHUNK_ROWS行ずつ
+    Pythonオブジェクトに変換し、DataFrame全体のobject型コピーを作らない。
+
     Args:
         df: Excel出力するDataFrame
 
@@ -431,30 +884,31 @@ def export_to_excel(df: pd.DataFrame) -> bytes:
         bytes: Excelファイルのバイナリデータ
     """
     from io import BytesIO
+    import xlsxwriter
 
     output = BytesIO()
-
-    # ExcelWriterを使用してDataFrameを書き込み
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Sales Data')
-
-        # ワークシートの取得と書式設定
-        worksheet = writer.sheets['Sales Data']
-
-        # 列幅の自動調整
-        for column in worksheet.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)  # 最大50文字
-            worksheet.column_dimensions[column_letter].width = adjusted_width
-
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True, 'use_zip64': True})
+    worksheet = workbook.add_worksheet(EXCEL_SHEET_NAME)
+
+    header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+    datetime_format = workbook.add_format({'num_format': EXCEL_DATETIME_FORMAT})
+
+    # constant_memoryモードでは書き込み済みの行を変更できないため、列幅と書式を先に設定する
+    widths = _excel_column_widths(df)
+    for idx, col in enumerate(df.columns):
+        cell_format = datetime_format if pd.api.types.is_datetime64_any_dtype(df[col]) else None
+        worksheet.set_column(idx, idx, int(widths[idx]), cell_format)
+
+    # pandasのto_excelは列順にセルを書き込むため、constant_memoryモードでは行順に直接書き込む
+    worksheet.write_row(0, 0, [str(col) for col in df.columns], header_format)
+    for start in range(0, len(df), EXCEL_WRITE_CHUNK_ROWS):
+        chunk = df.iloc[start:start + EXCEL_WRITE_CHUNK_ROWS]
+        values = chunk.astype(object).where(chunk.notna(), None)
+        for row_idx, row in enumerate(values.itertuples(index=False, name=None), start=start + 1):
+            worksheet.write_row(row_idx, 0, row)
+
+    workbook.close()
     output.seek(0)
-    logger.info(f"Excelファイル生成完了: {len(df)}行, {len(df.columns)}列")
+    logger.info("Excelファイル生成完了: %d行, %d列", len(df), len(df.columns))
 
     return output.getvalue()
@@ -10,6 +10,7 @@ import plotly.graph_objects as go
 import plotly.io as pio
 from datetime import datetime
 from io import BytesIO
+from typing import BinaryIO, List, Optional, Union
 import os
 
 # カラースキーム（デザインサンプル準拠）
@@ -23,6 +24,83 @@ COLORS = {
     'dark_gray': (43, 61, 79)       # ダークグレー #2B3D4F
 }
 
+# 日本語フォント（IPAexゴシック）のパスとフォント名
+JAPANESE_FONT_PATH = os.path.join('assets', 'fonts', 'ipaexg.ttf')
+JAPANESE_FONT_FAMILY = 'IPAGothic'
+
+# 日本語フォントのパス（見つかった場合のみ保持し、見つからない場合は次回のレポートで再度探す）
+_japanese_font_path = None
+
+
+def _find_japanese_font() -> Optional[str]:
+    """
+    日本語フォントのパスを取得する（見つかった後はファイルシステムを確認しない）
+
+    Returns:
+        Optional[str]: フォントファイルのパス（見つからない場合はNone）
+    """
+    global _japanese_font_path
+    if _japanese_font_path is None and os.path.exists(JAPANESE_FONT_PATH):
+        _japanese_font_path = JAPANESE_FONT_PATH
+    return _japanese_font_path
+
+
+def render_chart_png(fig) -> bytes:
+    """
+    PlotlyグラフをkaleidoでPNG画像に変換
+
+    Args:
+        fig: Plotly figure オブジェクト
+
+    Returns:
+        bytes: PNG画像データ
+
+    Raises:
+        ValueError: グラフがNull、または画像データが空の場合
+    """
+    if fig is None:
+        raise ValueError("グラフオブジェクトがNullです")
+
+    img_bytes = pio.to_image(
+        fig,
+        format='png',
+        width=800,
+        height=400,
+        engine='kaleido'
+    )
+
+    if not img_bytes or len(img_bytes) == 0:
+        raise ValueError("グラフ画像の生成に失敗しました（空の画像データ）")
+
+    return img_bytes
+
+
+# kaleidoの事前起動が成功したかどうか（失敗した場合は次回の呼び出しで再試行する）
+_chart_renderer_ready = False
+
+
+def warm_up_chart_renderer() -> bool:
+    """
+    kaleidoを事前に起動しておく（成功するまで。成功後は何もしない）
+
+    kaleidoは初回変換時にChromiumを起動するため、最初のグラフ変換だけが大幅に遅い。
+    レポート生成前に小さなグラフを1枚変換し、起動コストを先に払っておく。
+
+    Returns:
+        bool: 起動に成功した場合（既に起動済みの場合を含む）はTrue
+    """
+    global _chart_renderer_ready
+    if _chart_renderer_ready:
+        return True
+    try:
+        pio.to_image(go.Figure(), format='png', width=10, height=10, engine='kaleido')
+        _chart_renderer_ready = True
+        return True
+    except Exception as e:
+        import logging
+        logging.warning("kaleidoの事前起動に失敗しました: %s", e)
+        return False
+
 
 class ModernPDFReport(FPDF):
     """
@@ -36,24 +114,21 @@ class ModernPDFReport(FPDF):
         """初期化"""
         super().__init__()
 
-        # 日本語フォント登録
-        font_path = os.path.join('assets', 'fonts', 'ipaexg.ttf')
-        if os.path.exists(font_path):
+        # 日本語フォント登録（使用できない場合はHelvetica）
+        self.font_name = 'Helvetica'
+        self.font_loaded = False
+        font_path = _find_japanese_font()
+        if font_path:
             try:
-                self.add_font('IPAGothic', '', font_path, uni=True)
-                self.font_name = 'IPAGothic'
+                self.add_font(JAPANESE_FONT_FAMILY, '', font_path)
+                self.font_name = JAPANESE_FONT_FAMILY
                 self.font_loaded = True
             except Exception as e:
                 import logging
-                logging.warning(f"フォント読み込みエラー: {e}. Helveticaを使用します。")
-                self.font_name = 'Helvetica'
-                self.font_loaded = False
+                logging.warning("フォント読み込みエラー: %s. Helveticaを使用します。", e)
         else:
-            # フォントがない場合はHelveticaを使用
             import logging
             logging.info("日本語フォントが見つかりません。Helveticaを使用します。")
-            self.font_name = 'Helvetica'
-            self.font_loaded = False
 
         # レポートメタデータ
         self.report_title = "売上分析レポート"
@@ -142,13 +217,14 @@ class ModernPDFReport(FPDF):
 
         self.set_y(y_start + 2 * (box_height + 5) + 10)
 
-    def add_chart_section(self, fig, title: str):
+    def add_chart_section(self, fig, title: str, img_bytes: Optional[bytes] = None):
         """
         グラフセクション
 
         Args:
             fig: Plotly figure オブジェクト
             title: セクションタイトル
+            img_bytes: 変換済みのPNG画像データ（省略時はfigから変換）
         """
         # セクションタイトル
         self.set_font(self.font_name, '', 14)
@@ -158,65 +234,27 @@ class ModernPDFReport(FPDF):
 
         # Plotly → PNG変換
         try:
-            import uuid
-
-            # グラフデータの検証
-            if fig is None:
-                raise ValueError("グラフオブジェクトがNullです")
-
-            img_bytes = pio.to_image(
-                fig,
-                format='png',
-                width=800,
-                height=400,
-                engine='kaleido'
-            )
+            if img_bytes is None:
+                img_bytes = render_chart_png(fig)
 
-            if not img_bytes or len(img_bytes) == 0:
-                raise ValueError("グラフ画像の生成に失敗しました（空の画像データ）")
-
-            # BytesIOに保存
-            img_buffer = BytesIO(img_bytes)
-
-            # PDF中央に配置
+            # PDF中央に配置（一時ファイルを経由せずメモリ上の画像を埋め込む）
             img_width = 180
             x_centered = (210 - img_width) / 2
-
-            # 一時ファイルに保存（ユニークな名前を使用）
-            temp_path = f'temp_chart_{uuid.uuid4().hex}.png'
-
-            try:
-                with open(temp_path, 'wb') as f:
-                    f.write(img_bytes)
-            except PermissionError:
-                raise PermissionError(f"ファイル '{temp_path}' の書き込み権限がありません。")
-            except OSError as e:
-                if "No space left on device" in str(e):
-                    raise OSError("ディスク容量が不足しています。")
-                raise
-
-            self.image(temp_path, x=x_centered, w=img_width)
-
-            # 一時ファイル削除
-            try:
-                os.remove(temp_path)
-            except Exception as cleanup_error:
-                import logging
-                logging.warning(f"一時ファイル削除エラー: {cleanup_error}")
+            self.image(BytesIO(img_bytes), x=x_centered, w=img_width)
 
         except ImportError as e:
             self.set_font(self.font_name, '', 10)
             self.set_text_color(200, 0, 0)
             self.cell(0, 10, 'kaleidoパッケージがインストールされていません', 0, 1)
             import logging
-            logging.error(f"Kaleido import error: {e}")
+            logging.error("Kaleido import error: %s", e)
 
         except Exception as e:
             self.set_font(self.font_name, '', 10)
             self.set_text_color(200, 0, 0)
             self.cell(0, 10, f'グラフ生成エラー: {str(e)}', 0, 1)
             import logging
-            logging.error(f"Chart generation error: {e}")
+            logging.error("Chart generation error: %s", e)
 
         self.ln(5)
 
@@ -255,7 +293,18 @@ class ModernPDFReport(FPDF):
         # データ行
         self.set_text_color(*COLORS['dark_gray'])
 
-        for i, row in display_df.iterrows():
+        # 表示文字列をカラム単位でまとめて整形（数値は桁区切り、その他は20文字まで）
+        text_columns = []
+        for col in display_df.columns:
+            series = display_df[col]
+            if pd.api.types.is_integer_dtype(series):
+                text_columns.append(series.map('{:,.0f}'.format).to_numpy())
+            elif pd.api.types.is_float_dtype(series):
+                text_columns.append(series.map('{:,.2f}'.format).to_numpy())
+            else:
+                text_columns.append(series.astype(str).str.slice(0, 20).to_numpy())
+
+        for i, texts in enumerate(zip(*text_columns)):
             # 交互に色を変える
             if i % 2 == 0:
                 self.set_fill_color(*COLORS['light_gray'])
@@ -263,13 +312,7 @@ class ModernPDFReport(FPDF):
             else:
                 fill = False
 
-            for value in row:
-                # 数値フォーマット
-                if isinstance(value, (int, float)):
-                    text = f"{value:,.0f}" if isinstance(value, int) else f"{value:,.2f}"
-                else:
-                    text = str(value)[:20]
-
+            for text in texts:
                 self.cell(col_width, row_height, text, 1, 0, 'C', fill)
             self.ln()
 
@@ -299,26 +342,47 @@ class ModernPDFReport(FPDF):
 
         self.ln(5)
 
+    def _render_charts(self, charts: list) -> List[Optional[bytes]]:
+        """
+        全グラフを順にPNG画像へ変換
+
+        kaleidoは変換を1プロセスで逐次処理するため、スレッドから並列に呼び出しても速くならない。
+
+        Args:
+            charts: [(fig, title), ...] のリスト
+
+        Returns:
+            List[Optional[bytes]]: グラフごとのPNG画像データ（変換に失敗したグラフはNone）
+        """
+        images = []
+        for fig, _ in charts:
+            try:
+                images.append(render_chart_png(fig))
+            except Exception:
+                # 失敗したグラフはadd_chart_sectionで再変換し、エラー内容をPDFに表示する
+                images.append(None)
+        return images
+
     def generate_report(
         self,
-        output_path: str,
+        output_path: Union[str, BinaryIO],
         summary_data: dict,
         charts: list = None,
         tables: list = None,
         insights: list = None
-    ) -> str:
+    ) -> Union[str, BinaryIO]:
         """
         レポート生成
 
         Args:
-            output_path: 出力ファイルパス
+            output_path: 出力ファイルパス、または書き込み先のファイルオブジェクト（BytesIO等）
             summary_data: サマリーデータ
             charts: [(fig, title), ...] のリスト
             tables: [(df, title), ...] のリスト
             insights: 所見のリスト
 
         Returns:
-            生成されたファイルパス
+            生成されたファイルパス（ファイルオブジェクトを渡した場合はそのオブジェクト）
 
         Raises:
             PermissionError: ファイル書き込み権限がない場合
@@ -327,8 +391,9 @@ class ModernPDFReport(FPDF):
         """
         import logging
 
-        # 出力ディレクトリの存在確認
-        output_dir = os.path.dirname(output_path)
+        # 出力ディレクトリの存在確認（ファイルオブジェクトへの出力時は不要）
+        is_path = isinstance(output_path, (str, os.PathLike))
+        output_dir = os.path.dirname(output_path) if is_path else None
         if output_dir and not os.path.exists(output_dir):
             try:
                 os.makedirs(output_dir, exist_ok=True)
@@ -346,13 +411,14 @@ class ModernPDFReport(FPDF):
             # サマリーセクション
             self.add_summary_section(summary_data)
 
-            # グラフセクション
+            # グラフセクション（画像変換はレイアウト前にまとめて実行）
             if charts:
-                for fig, title in charts:
+                images = self._render_charts(charts)
+                for (fig, title), img_bytes in zip(charts, images):
                     # ページが足りない場合は新規ページ
                     if self.get_y() > 200:
                         self.add_page()
-                    self.add_chart_section(fig, title)
+                    self.add_chart_section(fig, title, img_bytes)
 
             # テーブルセクション
             if tables:
@@ -377,10 +443,10 @@ class ModernPDFReport(FPDF):
                     raise OSError("ディスク容量が不足しています。")
                 raise
 
-            logging.info(f"PDFレポート生成完了: {output_path}")
+            logging.info("PDFレポート生成完了: %s", output_path if is_path else 'メモリ上に出力')
 
             return output_path
 
         except Exception as e:
-            logging.error(f"PDFレポート生成エラー: {e}")
+            logging.error("PDFレポート生成エラー: %s", e)
             raise
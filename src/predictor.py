@@ -6,13 +6,12 @@
 
 import pandas as pd
 import numpy as np
-from sklearn.linear_model import LinearRegression
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 from datetime import datetime, timedelta
+from typing import Dict, Tuple, Union
 import logging
 
 # ロガー設定
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
@@ -30,37 +29,98 @@ def date_to_numeric(dates: pd.Series, origin: pd.Timestamp) -> np.ndarray:
     return (dates - origin).dt.days.values
 
 
+def _civil_from_days(days: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    1970-01-01からの経過日数を年・月・日に変換する（グレゴリオ暦、整数演算のみ）
+
+    H. Hinnantのcivil_from_daysアルゴリズムをNumPyの配列演算で行う。
+
+    Args:
+        days: 1970-01-01からの経過日数（int64）
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: (年, 月（1-12）, 日（1-31）)
+    """
+    z = days + 719468
+    era = z // 146097
+    doe = z - era * 146097                                          # 400年周期内の日数 [0, 146096]
+    yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365  # 周期内の年 [0, 399]
+    doy = doe - (365 * yoe + yoe // 4 - yoe // 100)                 # 3月1日起点の年内日数 [0, 365]
+    mp = (5 * doy + 2) // 153                                       # 3月起点の月 [0, 11]
+    day = doy - (153 * mp + 2) // 5 + 1
+    month = np.where(mp < 10, mp + 3, mp - 9)
+    year = yoe + era * 400 + (month <= 2)
+    return year, month, day
+
+
+def _date_features(days: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    1970-01-01からの経過日数から時系列特徴量（曜日・月・四半期・年・日・週末フラグ）を求める
+
+    Args:
+        days: 1970-01-01からの経過日数（int64）
+
+    Returns:
+        Dict[str, np.ndarray]: 特徴量名と値の配列（値の範囲に合わせた最小の整数型）
+    """
+    year, month, day = _civil_from_days(days)
+
+    # 曜日（0=月曜, 6=日曜。1970-01-01は木曜日）
+    day_of_week = ((days + 3) % 7).astype(np.int8)
+    month = month.astype(np.int8)
+
+    return {
+        'DayOfWeek': day_of_week,
+        'Month': month,
+        'Quarter': (month - 1) // 3 + 1,  # 四半期（1-4）
+        'Year': year.astype(np.int16),
+        'DayOfMonth': day.astype(np.int8),
+        'IsWeekend': (day_of_week >= 5).astype(np.uint8)  # 週末フラグ
+    }
+
+
 def create_features(df: pd.DataFrame) -> pd.DataFrame:
     """
     時系列特徴量を作成
 
+    日付を1970-01-01からの経過日数（整数）に変換し、曜日・年月日を整数演算でまとめて求める。
+
     Args:
-        df: 日付カラムを持つDataFrame（'Date'カラム必須）
+        df: 日付カラムを持つDataFrame（'Date'カラム必須、欠損（NaT）を含まないこと）
 
     Returns:
         特徴量追加済みDataFrame
     """
-    df = df.copy()
+    days = df['Date'].to_numpy(dtype='datetime64[ns]').astype('datetime64[D]').view(np.int64)
+    return df.assign(**_date_features(days))
 
-    # 曜日（0=月曜, 6=日曜）
-    df['DayOfWeek'] = df['Date'].dt.dayofweek
 
-    # 月（1-12）
-    df['Month'] = df['Date'].dt.month
+def _fit_linear(X: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, float]:
+    """
+    正規方程式で線形回帰（切片あり）の係数を求める
 
-    # 四半期（1-4）
-    df['Quarter'] = df['Date'].dt.quarter
+    列を中心化して切片を分離し、特徴量数×特徴量数の連立方程式を解く。
+    特徴量が一定値の列などで行列が特異になる場合は最小二乗解（最小ノルム解）を使う。
 
-    # 年
-    df['Year'] = df['Date'].dt.year
+    Args:
+        X: 特徴量の行列（行数×特徴量数）
+        y: 目的変数
 
-    # 月の日（1-31）
-    df['DayOfMonth'] = df['Date'].dt.day
+    Returns:
+        Tuple[np.ndarray, float]: (係数, 切片)
+    """
+    X_mean = X.mean(axis=0)
+    y_mean = y.mean()
+    Xc = X - X_mean
+    yc = y - y_mean
 
-    # 週末フラグ
-    df['IsWeekend'] = (df['DayOfWeek'] >= 5).astype(int)
+    try:
+        coef = np.linalg.solve(Xc.T @ Xc, Xc.T @ yc)
+    except np.linalg.LinAlgError:
+        coef = np.linalg.lstsq(Xc, yc, rcond=None)[0]
 
-    return df
+    intercept = float(y_mean - X_mean @ coef)
+    return coef, intercept
 
 
 class SalesPredictor:
@@ -72,7 +132,8 @@ class SalesPredictor:
 
     def __init__(self):
         """初期化"""
-        self.model = LinearRegression()
+        self.coef_ = None
+        self.intercept_ = 0.0
         self.is_trained = False
         self.date_origin = None
         self.last_training_date = None
@@ -101,44 +162,38 @@ class SalesPredictor:
                 f"より長期間のデータをアップロードしてください。"
             )
 
-        df = df.copy()
+        # 日次売上に集計（起点日からの日数を添字として全日付分の配列に加算するため、欠損日は0になる）
+        dates = pd.to_datetime(df[date_col]).to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+        sales = df[sales_col].to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = ~(np.isnat(dates) | np.isnan(sales))
+        if not valid.any():
+            raise ValueError("有効な日付・売上のデータがありません。データを確認してください。")
+        dates = dates[valid]
 
-        # 日次売上に集計
-        daily_df = df.groupby(date_col)[sales_col].sum().reset_index()
-        daily_df.columns = ['Date', 'Sales']
-
-        # 日付でソート
-        daily_df = daily_df.sort_values('Date').reset_index(drop=True)
+        origin = dates.min()
+        offsets = (dates - origin).astype(np.int64)
+        daily_sales = np.bincount(offsets, weights=sales[valid])
 
         # 起点日と最終日を記録
-        self.date_origin = daily_df['Date'].min()
-        self.last_training_date = daily_df['Date'].max()
-
-        # 日付範囲の全日付を生成（欠損日を補完）
-        date_range = pd.date_range(
-            start=self.date_origin,
-            end=self.last_training_date,
-            freq='D'
-        )
+        self.date_origin = pd.Timestamp(origin)
+        self.last_training_date = self.date_origin + pd.Timedelta(days=len(daily_sales) - 1)
 
-        # 全日付のDataFrame作成
-        full_df = pd.DataFrame({'Date': date_range})
-
-        # 元データとマージ（欠損日は0で埋める）
-        daily_df = full_df.merge(daily_df, on='Date', how='left')
-        daily_df['Sales'].fillna(0, inplace=True)
+        daily_df = pd.DataFrame({
+            'Date': pd.date_range(start=self.date_origin, periods=len(daily_sales), freq='D'),
+            'Sales': daily_sales
+        })
 
         # 特徴量作成
         daily_df = create_features(daily_df)
 
         # 日付を数値に変換
-        daily_df['DaysFromOrigin'] = date_to_numeric(daily_df['Date'], self.date_origin)
+        daily_df['DaysFromOrigin'] = date_to_numeric(daily_df['Date'], self.date_origin).astype(np.int32)
 
         # 特徴量とターゲットを分離
         X = daily_df[self.feature_columns]
         y = daily_df['Sales']
 
-        logger.info(f"データ前処理完了: {len(daily_df)}日分のデータ")
+        logger.info("データ前処理完了: %d日分のデータ", len(daily_df))
 
         return X, y, daily_df
 
@@ -153,31 +208,33 @@ class SalesPredictor:
         Raises:
             ValueError: データにNaNまたはInfが含まれている場合
         """
-        # NaN/Infチェック
-        if X.isnull().any().any():
-            raise ValueError("特徴量にNaN（欠損値）が含まれています。データを確認してください。")
-
-        if y.isnull().any():
-            raise ValueError("売上データにNaN（欠損値）が含まれています。データを確認してください。")
+        # float64の配列に1回だけ変換し、NaN/Infをまとめて判定する（エラー時のみ内容を特定する）
+        X_values = X.to_numpy(dtype=np.float64, na_value=np.nan)
+        y_values = y.to_numpy(dtype=np.float64, na_value=np.nan)
 
-        if np.isinf(X.values).any():
+        if not np.isfinite(X_values).all():
+            if np.isnan(X_values).any():
+                raise ValueError("特徴量にNaN（欠損値）が含まれています。データを確認してください。")
             raise ValueError("特徴量に無限大（Inf）の値が含まれています。データを確認してください。")
 
-        if np.isinf(y.values).any():
+        if not np.isfinite(y_values).all():
+            if np.isnan(y_values).any():
+                raise ValueError("売上データにNaN（欠損値）が含まれています。データを確認してください。")
             raise ValueError("売上データに無限大（Inf）の値が含まれています。データを確認してください。")
 
         try:
-            self.model.fit(X, y)
+            self.coef_, self.intercept_ = _fit_linear(X_values, y_values)
             self.is_trained = True
 
             # 訓練データでの予測
-            y_pred = self.model.predict(X)
+            y_pred = self.predict_from_features(X_values)
 
             # 訓練スコア
-            train_r2 = r2_score(y, y_pred)
-            train_rmse = np.sqrt(mean_squared_error(y, y_pred))
+            train_r2 = r2_score(y_values, y_pred)
+            train_rmse = np.sqrt(mean_squared_error(y_values, y_pred))
 
-            logger.info(f"モデル訓練完了 - R²: {train_r2:.4f}, RMSE: ${train_rmse:,.0f}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(f"モデル訓練完了 - R²: {train_r2:.4f}, RMSE: ${train_rmse:,.0f}")
 
         except Exception as e:
             self.is_trained = False
@@ -204,35 +261,53 @@ class SalesPredictor:
 
         # 予測期間の妥当性チェック
         if periods > 365:
-            logger.warning(f"予測期間が長すぎます（{periods}日）。精度が低下する可能性があります。")
+            logger.warning("予測期間が長すぎます（%d日）。精度が低下する可能性があります。", periods)
 
         if periods <= 0:
             raise ValueError(f"予測期間は正の整数である必要があります。現在: {periods}日")
 
-        # 訓練データの最終日の翌日から将来の日付を生成
-        future_dates = pd.date_range(
-            start=self.last_training_date + timedelta(days=1),
-            periods=periods,
-            freq='D'
-        )
+        # 訓練データの最終日の翌日からの経過日数（1970-01-01起点）を生成し、
+        # DataFrameを経由せずに特徴量行列を作成する
+        origin_day = self.date_origin.to_datetime64().astype('datetime64[D]').astype(np.int64)
+        last_day = self.last_training_date.to_datetime64().astype('datetime64[D]').astype(np.int64)
+        future_days = np.arange(last_day + 1, last_day + 1 + periods, dtype=np.int64)
 
-        # 将来データのDataFrame作成
-        future_df = pd.DataFrame({'Date': future_dates})
+        features = _date_features(future_days)
+        features['DaysFromOrigin'] = (future_days - origin_day).astype(np.int32)
+        X_future = np.empty((periods, len(self.feature_columns)), dtype=np.float64)
+        for j, col in enumerate(self.feature_columns):
+            X_future[:, j] = features[col]
 
-        # 特徴量作成
-        future_df = create_features(future_df)
-        future_df['DaysFromOrigin'] = date_to_numeric(future_df['Date'], self.date_origin)
+        # 予測実行（負の予測値は0にクリップ）
+        predicted = self.predict_from_features(X_future)
+        np.maximum(predicted, 0.0, out=predicted)
 
-        # 予測実行
-        X_future = future_df[self.feature_columns]
-        future_df['Predicted_Sales'] = self.model.predict(X_future)
+        future_df = pd.DataFrame({
+            'Date': future_days.astype('datetime64[D]').astype('datetime64[ns]'),
+            'Predicted_Sales': predicted
+        })
 
-        # 負の予測値を0にクリップ
-        future_df['Predicted_Sales'] = future_df['Predicted_Sales'].clip(lower=0)
+        logger.info("%d日分の予測完了", periods)
 
-        logger.info(f"{periods}日分の予測完了")
+        return future_df
+
+    def predict_from_features(self, X: Union[pd.DataFrame, np.ndarray]) -> np.ndarray:
+        """
+        特徴量から売上を予測
+
+        Args:
+            X: 特徴量DataFrameまたは行列（列はfeature_columnsの順）
+
+        Returns:
+            np.ndarray: 予測値
+
+        Raises:
+            ValueError: モデルが訓練されていない場合
+        """
+        if not self.is_trained:
+            raise ValueError("モデルが訓練されていません。先にtrain()を呼び出してください。")
 
-        return future_df[['Date', 'Predicted_Sales']]
+        return np.asarray(X, dtype=np.float64) @ self.coef_ + self.intercept_
 
     def evaluate(self, y_true: np.ndarray, y_pred: np.ndarray) -> dict:
         """
@@ -255,7 +330,8 @@ class SalesPredictor:
             'R2_Score': r2
         }
 
-        logger.info(f"評価完了 - RMSE: ${rmse:,.0f}, MAE: ${mae:,.0f}, R²: {r2:.4f}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"評価完了 - RMSE: ${rmse:,.0f}, MAE: ${mae:,.0f}, R²: {r2:.4f}")
 
         return metrics
 
@@ -278,6 +354,6 @@ class SalesPredictor:
         y_train = y.iloc[:split_index]
         y_test = y.iloc[split_index:]
 
-        logger.info(f"訓練データ: {len(X_train)}日, テストデータ: {len(X_test)}日")
+        logger.info("訓練データ: %d日, テストデータ: %d日", len(X_train), len(X_test))
 
         return X_train, X_test, y_train, y_test
@@ -4,10 +4,11 @@
 7種類のPlotlyグラフを生成する機能を提供します。
 """
 
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from typing import Literal
+from typing import Any, Dict, Literal, Optional
 import logging
 
 # ロガー設定
@@ -26,6 +27,14 @@ COLORS = {
 # カラーパレット（グラフ用）- クリーンでモダンな配色
 COLOR_PALETTE = ['#3B82F6', '#8B5CF6', '#10B981', '#F59E0B', '#EF4444', '#06B6D4', '#EC4899', '#6366F1']
 
+# 月名（月の数値1-12で直接参照できるよう先頭は空文字）
+MONTH_NAMES = np.array([''] + [f'{month}月' for month in range(1, 13)], dtype=object)
+
+# 折れ線グラフの最大描画点数（超える場合はLTTBで間引く）
+MAX_LINE_POINTS = 5000
+# この点数を超える折れ線はWebGL（Scattergl）で描画する
+WEBGL_MIN_POINTS = 1000
+
 
 class GraphGenerationError(Exception):
     """グラフ生成エラー"""
@@ -62,7 +71,42 @@ def validate_dataframe_for_plot(df: pd.DataFrame, required_columns: list, min_ro
         if df[col].isnull().all():
             raise GraphGenerationError(f"カラム '{col}' のすべての値が欠損しています。")
 
-    logger.info(f"グラフ生成前バリデーション完了: {len(df)}行, 必須カラム {required_columns}")
+    logger.info("グラフ生成前バリデーション完了: %d行, 必須カラム %s", len(df), required_columns)
+
+
+# 全グラフ共通のレイアウト設定（デザインサンプル準拠。呼び出しごとに組み立てず使い回す）
+_COMMON_LAYOUT = dict(
+    template='plotly_white',
+    hovermode='x unified',
+    showlegend=True,
+    height=400,  # グラフサンプルに合わせて高さ調整
+    title_font_size=14,
+    title_font_family='Noto Sans CJK JP, Noto Sans JP, Hiragino Sans, Meiryo',
+    title_font_color='#2B3D4F',
+    plot_bgcolor='#FAFBFC',  # 薄いグレー背景
+    paper_bgcolor='white',
+    margin=dict(l=80, r=40, t=60, b=80),
+    font=dict(
+        size=11,
+        family='Noto Sans CJK JP, Noto Sans JP, Hiragino Sans, Meiryo',
+        color='#4B5563'
+    ),
+    # グリッドラインをより控えめに
+    xaxis=dict(
+        gridcolor='#E5E7EB',
+        gridwidth=0.5,
+        showline=True,
+        linewidth=1,
+        linecolor='#D1D5DB'
+    ),
+    yaxis=dict(
+        gridcolor='#E5E7EB',
+        gridwidth=0.5,
+        showline=True,
+        linewidth=1,
+        linecolor='#D1D5DB'
+    )
+)
 
 
 def apply_common_layout(fig, title: str):
@@ -76,49 +120,175 @@ def apply_common_layout(fig, title: str):
     Returns:
         fig: レイアウト適用済みfigure
     """
-    fig.update_layout(
-        template='plotly_white',
-        hovermode='x unified',
-        showlegend=True,
-        height=400,  # グラフサンプルに合わせて高さ調整
-        title_font_size=14,
-        title_font_family='Noto Sans CJK JP, Noto Sans JP, Hiragino Sans, Meiryo',
-        title_font_color='#2B3D4F',
-        title_text=title,
-        plot_bgcolor='#FAFBFC',  # 薄いグレー背景
-        paper_bgcolor='white',
-        margin=dict(l=80, r=40, t=60, b=80),
-        font=dict(
-            size=11,
-            family='Noto Sans CJK JP, Noto Sans JP, Hiragino Sans, Meiryo',
-            color='#4B5563'
-        ),
-        # グリッドラインをより控えめに
-        xaxis=dict(
-            gridcolor='#E5E7EB',
-            gridwidth=0.5,
-            showline=True,
-            linewidth=1,
-            linecolor='#D1D5DB'
-        ),
-        yaxis=dict(
-            gridcolor='#E5E7EB',
-            gridwidth=0.5,
-            showline=True,
-            linewidth=1,
-            linecolor='#D1D5DB'
-        )
-    )
+    fig.update_layout(**_COMMON_LAYOUT, title_text=title)
     return fig
 
 
-def plot_sales_trend(df: pd.DataFrame, period: Literal['daily', 'monthly', 'yearly'] = 'daily'):
+def downsample_lttb(y, n_out: int, x=None) -> np.ndarray:
+    """
+    LTTB（Largest-Triangle-Three-Buckets）法で折れ線の描画点を間引く
+
+    Args:
+        y: Y値の配列
+        n_out: 間引き後の点数
+        x: X値の配列（省略時は等間隔とみなす）
+
+    Returns:
+        np.ndarray: 残す点のインデックス（昇順）
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=np.float64)
+    x = np.arange(n, dtype=np.float64) if x is None else np.asarray(x, dtype=np.float64)
+
+    # 先頭・末尾を除いた点をn_out - 2個のバケットに分割し、各バケットから1点ずつ選ぶ
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    prev = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        # 前回選んだ点・次バケットの平均点と作る三角形の面積が最大の点を選ぶ
+        area = np.abs(
+            (x[prev] - avg_x) * (y[start:end] - y[prev])
+            - (x[prev] - x[start:end]) * (avg_y - y[prev])
+        )
+        prev = start + int(np.argmax(area))
+        indices[i + 1] = prev
+
+    return indices
+
+
+def make_line_trace(x, y, name: str, **kwargs):
+    """
+    大量の点を持つ系列に対応した折れ線トレースを作成
+
+    MAX_LINE_POINTSを超える系列はLTTBで間引き、WEBGL_MIN_POINTSを超える系列はScatterglで描画する。
+
+    Args:
+        x: X値（日付など）
+        y: Y値
+        name: 凡例名
+        **kwargs: トレースに渡す追加引数（line等）
+
+    Returns:
+        go.Scatter または go.Scattergl: 折れ線トレース
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+
+    if len(y) > MAX_LINE_POINTS:
+        x_values = x.astype('datetime64[ns]').astype(np.int64) if np.issubdtype(x.dtype, np.datetime64) else None
+        idx = downsample_lttb(y, MAX_LINE_POINTS, x=x_values)
+        x, y = x[idx], y[idx]
+
+    trace_cls = go.Scattergl if len(y) > WEBGL_MIN_POINTS else go.Scatter
+    return trace_cls(x=x, y=y, mode='lines', name=name, **kwargs)
+
+
+def _month_keys(dates) -> np.ndarray:
+    """日付を1970年1月からの経過月数（整数の集計キー）に変換する"""
+    return np.asarray(dates, dtype='datetime64[ns]').astype('datetime64[M]').astype(np.int64)
+
+
+def _month_labels(keys) -> np.ndarray:
+    """経過月数のキーを 'YYYY-MM' 形式のラベルに変換する"""
+    return np.datetime_as_string(np.asarray(keys, dtype=np.int64).astype('datetime64[M]'), unit='M')
+
+
+def _daily_sales(df: pd.DataFrame) -> pd.Series:
+    """日付（日単位）ごとの売上合計（インデックスは日付の昇順）"""
+    return df['Sales'].astype(np.float64).groupby(df['Order Date'].dt.normalize()).sum()
+
+
+def _product_totals(df: pd.DataFrame) -> pd.DataFrame:
+    """商品ごとの売上・利益合計（利益カラムがない場合は売上のみ）"""
+    value_columns = [col for col in ['Sales', 'Profit'] if col in df.columns]
+    return df.groupby('Product Name', observed=True, sort=False)[value_columns].sum()
+
+
+def _customer_totals(df: pd.DataFrame) -> pd.DataFrame:
+    """顧客・セグメントごとの売上・利益合計と注文数"""
+    customer_data = df.groupby(['Customer Name', 'Segment'], observed=True, sort=False).agg({
+        'Sales': 'sum',
+        'Profit': 'sum',
+        'Order ID': 'count'
+    }).reset_index()
+    return customer_data.rename(columns={'Order ID': 'Order Count'})
+
+
+def _regional_totals(df: pd.DataFrame) -> pd.DataFrame:
+    """地域ごとの売上合計"""
+    return df.groupby('Region', observed=True)['Sales'].sum().reset_index()
+
+
+def _category_monthly(df: pd.DataFrame) -> pd.DataFrame:
+    """月・カテゴリごとの売上合計（整数の月キーで集計し、ラベルは集計後に作成する）"""
+    dates = df['Order Date'].to_numpy(dtype='datetime64[ns]')
+    valid = ~np.isnat(dates)
+    if not valid.all():
+        df, dates = df[valid], dates[valid]
+
+    month = pd.Series(_month_keys(dates), index=df.index, name='Month')
+    category_data = df.groupby([month, 'Category'], observed=True)['Sales'].sum().reset_index()
+    category_data['Month'] = _month_labels(category_data['Month'])
+    return category_data
+
+
+# グラフ用の集計（キー: (集計関数, 必要なカラム)）
+_AGGREGATE_BUILDERS = {
+    'daily_sales': (_daily_sales, ['Order Date', 'Sales']),
+    'product': (_product_totals, ['Product Name', 'Sales']),
+    'customer': (_customer_totals, ['Customer Name', 'Segment', 'Sales', 'Profit', 'Order ID']),
+    'region': (_regional_totals, ['Region', 'Sales']),
+    'category_monthly': (_category_monthly, ['Order Date', 'Category', 'Sales']),
+}
+
+
+def build_plot_aggregates(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    各グラフで使用する集計をまとめて作成する
+
+    同じDataFrameから複数のグラフを作成する場合に、集計を1回だけ行い共有するために使う。
+    必要なカラムが揃っていない集計は作成しない。
+
+    Args:
+        df: データフレーム
+
+    Returns:
+        Dict[str, Any]: 集計名と集計結果の辞書（各plot_*関数のaggregates引数に渡す）
+    """
+    return {
+        key: builder(df)
+        for key, (builder, columns) in _AGGREGATE_BUILDERS.items()
+        if all(col in df.columns for col in columns)
+    }
+
+
+def _get_aggregate(df: pd.DataFrame, aggregates: Optional[Dict[str, Any]], key: str):
+    """作成済みの集計があればそれを使い、なければDataFrameから集計する"""
+    if aggregates is not None and key in aggregates:
+        return aggregates[key]
+    return _AGGREGATE_BUILDERS[key][0](df)
+
+
+def plot_sales_trend(df: pd.DataFrame, period: Literal['daily', 'monthly', 'yearly'] = 'daily',
+                     aggregates: Optional[Dict[str, Any]] = None):
     """
     日次/月次/年次売上推移を折れ線グラフで表示
 
     Args:
         df: データフレーム（'Order Date', 'Sales'カラム必須）
         period: 集計期間（'daily', 'monthly', 'yearly'）
+        aggregates: build_plot_aggregatesで作成した集計（省略時はdfから集計）
 
     Returns:
         fig: Plotly figure オブジェクト
@@ -129,26 +299,36 @@ def plot_sales_trend(df: pd.DataFrame, period: Literal['daily', 'monthly', 'year
     # バリデーション
     validate_dataframe_for_plot(df, required_columns=['Order Date', 'Sales'], min_rows=2)
 
-    df = df.copy()
-
-    # 期間に応じてグルーピング
+    # 期間に応じてグルーピング（日次売上から月次・年次を集計）
     if period == 'daily':
-        df['Period'] = df['Order Date'].dt.date
         title = "日次売上推移"
         x_label = "日付"
     elif period == 'monthly':
-        df['Period'] = df['Order Date'].dt.to_period('M').astype(str)
         title = "月次売上推移"
         x_label = "月"
     elif period == 'yearly':
-        df['Period'] = df['Order Date'].dt.year
         title = "年次売上推移"
         x_label = "年"
     else:
         raise ValueError(f"Invalid period: {period}")
 
-    # 集計
-    sales_data = df.groupby('Period')['Sales'].sum().reset_index()
+    daily_sales = _get_aggregate(df, aggregates, 'daily_sales')
+    if period == 'daily':
+        # X軸のラベルは集計後の日数分だけ 'YYYY-MM-DD' 形式の文字列にする
+        sales_data = daily_sales.set_axis(
+            np.datetime_as_string(daily_sales.index.to_numpy(dtype='datetime64[D]'), unit='D')
+        )
+    elif period == 'monthly':
+        sales_data = daily_sales.groupby(_month_keys(daily_sales.index)).sum()
+        sales_data.index = _month_labels(sales_data.index)
+    else:
+        sales_data = daily_sales.groupby(daily_sales.index.year).sum()
+    sales_data = sales_data.rename_axis('Period').reset_index()
+
+    # 描画点が多い場合はLTTBで間引き、WebGLで描画する
+    if len(sales_data) > MAX_LINE_POINTS:
+        sales_data = sales_data.iloc[downsample_lttb(sales_data['Sales'].to_numpy(), MAX_LINE_POINTS)]
+    use_webgl = len(sales_data) > WEBGL_MIN_POINTS
 
     # グラフ作成
     fig = px.line(
@@ -156,7 +336,8 @@ def plot_sales_trend(df: pd.DataFrame, period: Literal['daily', 'monthly', 'year
         x='Period',
         y='Sales',
         markers=True,
-        color_discrete_sequence=[COLORS['primary']]
+        color_discrete_sequence=[COLORS['primary']],
+        render_mode='webgl' if use_webgl else 'svg'
     )
 
     # レイアウト調整
@@ -164,7 +345,7 @@ def plot_sales_trend(df: pd.DataFrame, period: Literal['daily', 'monthly', 'year
     fig.update_xaxes(title_text=x_label, tickangle=-45)
     fig.update_yaxes(title_text="売上 ($)")
     fig.update_traces(
-        line=dict(width=2.5, shape='spline'),  # 滑らかなライン
+        line=dict(width=2.5) if use_webgl else dict(width=2.5, shape='spline'),  # 滑らかなライン（WebGLはspline非対応）
         marker=dict(size=6, line=dict(width=1.5, color='white')),  # マーカーに白い縁
         hovertemplate='%{x}<br>売上: $%{y:,.0f}<extra></extra>'
     )
@@ -172,13 +353,14 @@ def plot_sales_trend(df: pd.DataFrame, period: Literal['daily', 'monthly', 'year
     return fig
 
 
-def plot_product_ranking(df: pd.DataFrame, top_n: int = 10):
+def plot_product_ranking(df: pd.DataFrame, top_n: int = 10, aggregates: Optional[Dict[str, Any]] = None):
     """
     商品別売上ランキングを横棒グラフで表示
 
     Args:
         df: データフレーム（'Product Name', 'Sales'カラム必須）
         top_n: 表示する上位件数
+        aggregates: build_plot_aggregatesで作成した集計（省略時はdfから集計）
 
     Returns:
         fig: Plotly figure オブジェクト
@@ -190,10 +372,14 @@ def plot_product_ranking(df: pd.DataFrame, top_n: int = 10):
     validate_dataframe_for_plot(df, required_columns=['Product Name', 'Sales'], min_rows=1)
 
     # 商品別集計
-    product_sales = df.groupby('Product Name')['Sales'].sum().reset_index()
+    product_sales = _get_aggregate(df, aggregates, 'product')[['Sales']].reset_index()
 
-    # 上位N件を抽出して降順ソート
-    top_products = product_sales.nlargest(top_n, 'Sales').sort_values('Sales', ascending=True)
+    # 上位N件を抽出（argpartitionで上位N件を選び、その中だけを昇順に並べる。横棒グラフでは最大が上）
+    sales = product_sales['Sales'].to_numpy(dtype=np.float64)
+    k = min(top_n, sales.size)
+    top_idx = np.argpartition(-sales, k - 1)[:k] if k < sales.size else np.arange(sales.size)
+    top_idx = top_idx[np.argsort(sales[top_idx], kind='stable')]
+    top_products = product_sales.iloc[top_idx]
 
     # グラフ作成
     fig = px.bar(
@@ -223,12 +409,13 @@ def plot_product_ranking(df: pd.DataFrame, top_n: int = 10):
     return fig
 
 
-def plot_customer_analysis(df: pd.DataFrame):
+def plot_customer_analysis(df: pd.DataFrame, aggregates: Optional[Dict[str, Any]] = None):
     """
     顧客別売上・利益分析を散布図で表示
 
     Args:
         df: データフレーム（'Customer Name', 'Sales', 'Profit', 'Segment'カラム必須）
+        aggregates: build_plot_aggregatesで作成した集計（省略時はdfから集計）
 
     Returns:
         fig: Plotly figure オブジェクト
@@ -240,13 +427,7 @@ def plot_customer_analysis(df: pd.DataFrame):
     validate_dataframe_for_plot(df, required_columns=['Customer Name', 'Sales', 'Profit', 'Segment', 'Order ID'], min_rows=1)
 
     # 顧客別集計
-    customer_data = df.groupby(['Customer Name', 'Segment']).agg({
-        'Sales': 'sum',
-        'Profit': 'sum',
-        'Order ID': 'count'
-    }).reset_index()
-
-    customer_data.rename(columns={'Order ID': 'Order Count'}, inplace=True)
+    customer_data = _get_aggregate(df, aggregates, 'customer')
 
     # グラフ作成
     fig = px.scatter(
@@ -274,12 +455,13 @@ def plot_customer_analysis(df: pd.DataFrame):
     return fig
 
 
-def plot_yoy_comparison(df: pd.DataFrame):
+def plot_yoy_comparison(df: pd.DataFrame, aggregates: Optional[Dict[str, Any]] = None):
     """
     前年同月比較をグループ化棒グラフで表示
 
     Args:
         df: データフレーム（'Order Date', 'Sales'カラム必須）
+        aggregates: build_plot_aggregatesで作成した集計（省略時はdfから集計）
 
     Returns:
         fig: Plotly figure オブジェクト
@@ -290,19 +472,21 @@ def plot_yoy_comparison(df: pd.DataFrame):
     # バリデーション
     validate_dataframe_for_plot(df, required_columns=['Order Date', 'Sales'], min_rows=2)
 
-    df = df.copy()
-
-    # 年・月を抽出
-    df['Year'] = df['Order Date'].dt.year.astype(str)
-    df['Month'] = df['Order Date'].dt.month
-
-    # 年別・月別集計
-    yoy_data = df.groupby(['Year', 'Month'])['Sales'].sum().reset_index()
+    # 年別・月別集計（日次売上を経過月数のキーでbincountし、データのある月のみ残す）
+    daily_sales = _get_aggregate(df, aggregates, 'daily_sales')
+    keys = _month_keys(daily_sales.index)
+    offsets = keys - keys.min()
+    totals = np.bincount(offsets, weights=daily_sales.to_numpy(dtype=np.float64))
+    present = np.bincount(offsets) > 0
+    months = np.arange(keys.min(), keys.min() + totals.size)[present]
+    yoy_data = pd.DataFrame({
+        'Year': (months // 12 + 1970).astype(str),
+        'Month': months % 12 + 1,
+        'Sales': totals[present]
+    })
 
     # 月名を追加
-    month_names = {1: '1月', 2: '2月', 3: '3月', 4: '4月', 5: '5月', 6: '6月',
-                   7: '7月', 8: '8月', 9: '9月', 10: '10月', 11: '11月', 12: '12月'}
-    yoy_data['Month Name'] = yoy_data['Month'].map(month_names)
+    yoy_data['Month Name'] = MONTH_NAMES[yoy_data['Month'].to_numpy()]
 
     # グラフ作成
     fig = px.bar(
@@ -330,12 +514,13 @@ def plot_yoy_comparison(df: pd.DataFrame):
     return fig
 
 
-def plot_regional_sales(df: pd.DataFrame):
+def plot_regional_sales(df: pd.DataFrame, aggregates: Optional[Dict[str, Any]] = None):
     """
     地域別売上を円グラフで表示
 
     Args:
         df: データフレーム（'Region', 'Sales'カラム必須）
+        aggregates: build_plot_aggregatesで作成した集計（省略時はdfから集計）
 
     Returns:
         fig: Plotly figure オブジェクト
@@ -347,7 +532,7 @@ def plot_regional_sales(df: pd.DataFrame):
     validate_dataframe_for_plot(df, required_columns=['Region', 'Sales'], min_rows=1)
 
     # 地域別集計
-    regional_sales = df.groupby('Region')['Sales'].sum().reset_index()
+    regional_sales = _get_aggregate(df, aggregates, 'region')
 
     # グラフ作成
     fig = px.pie(
@@ -371,12 +556,13 @@ def plot_regional_sales(df: pd.DataFrame):
     return fig
 
 
-def plot_category_breakdown(df: pd.DataFrame):
+def plot_category_breakdown(df: pd.DataFrame, aggregates: Optional[Dict[str, Any]] = None):
     """
     カテゴリ別・期間別売上を積み上げ棒グラフで表示
 
     Args:
         df: データフレーム（'Order Date', 'Category', 'Sales'カラム必須）
+        aggregates: build_plot_aggregatesで作成した集計（省略時はdfから集計）
 
     Returns:
         fig: Plotly figure オブジェクト
@@ -387,13 +573,8 @@ def plot_category_breakdown(df: pd.DataFrame):
     # バリデーション
     validate_dataframe_for_plot(df, required_columns=['Order Date', 'Category', 'Sales'], min_rows=2)
 
-    df = df.copy()
-
-    # 月次データ作成
-    df['Month'] = df['Order Date'].dt.to_period('M').astype(str)
-
     # カテゴリ別・月別集計
-    category_data = df.groupby(['Month', 'Category'])['Sales'].sum().reset_index()
+    category_data = _get_aggregate(df, aggregates, 'category_monthly')
 
     # グラフ作成
     fig = px.bar(
@@ -414,12 +595,13 @@ def plot_category_breakdown(df: pd.DataFrame):
     return fig
 
 
-def plot_profit_margin(df: pd.DataFrame):
+def plot_profit_margin(df: pd.DataFrame, aggregates: Optional[Dict[str, Any]] = None):
     """
     商品別売上・利益率分析を散布図で表示
 
     Args:
         df: データフレーム（'Product Name', 'Sales', 'Profit'カラム必須）
+        aggregates: build_plot_aggregatesで作成した集計（省略時はdfから集計）
 
     Returns:
         fig: Plotly figure オブジェクト
@@ -431,19 +613,17 @@ def plot_profit_margin(df: pd.DataFrame):
     validate_dataframe_for_plot(df, required_columns=['Product Name', 'Sales', 'Profit'], min_rows=1)
 
     # 商品別集計
-    product_data = df.groupby('Product Name').agg({
-        'Sales': 'sum',
-        'Profit': 'sum'
-    }).reset_index()
+    product_data = _get_aggregate(df, aggregates, 'product')[['Sales', 'Profit']].reset_index()
 
-    # 利益率計算
-    product_data['Profit Margin (%)'] = (product_data['Profit'] / product_data['Sales'] * 100).round(2)
+    # 利益率計算（売上0の商品はinf/NaNとなり、下の範囲判定で除外される）
+    sales = product_data['Sales'].to_numpy(dtype=np.float64)
+    profit = product_data['Profit'].to_numpy(dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        margin = np.round(profit / sales * 100, 2)
 
     # 外れ値除去（利益率が-100%～100%の範囲）
-    product_data = product_data[
-        (product_data['Profit Margin (%)'] >= -100) &
-        (product_data['Profit Margin (%)'] <= 100)
-    ]
+    mask = np.abs(margin) <= 100
+    product_data = product_data[mask].assign(**{'Profit Margin (%)': margin[mask]})
 
     # グラフ作成
     fig = px.scatter(
@@ -0,0 +1,85 @@
+"""
+データ処理モジュールのテスト
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.data_processor import clean_data, load_csv, merge_dataframes
+
+
+def _write_csv(path, cities, encoding: str) -> None:
+    """必須カラムと都市名を持つCSVを指定エンコーディングで書き出す"""
+    lines = ["Order Date,Sales,Profit,Product Name,City"]
+    for i, city in enumerate(cities):
+        lines.append(f"1/{i % 28 + 1}/2016,{10 + i}.5,{i}.25,Staples {i},{city}")
+    path.write_bytes(("\n".join(lines) + "\n").encode(encoding))
+
+
+def test_load_csv_cp932_with_few_japanese_cells(tmp_path):
+    """日本語のセルが少ないcp932のCSVもiso-8859-1で文字化けさせずに読み込める"""
+    cities = ['Tokyo'] * 30
+    cities[3] = cities[17] = '東京'
+    path = tmp_path / 'sales_cp932.csv'
+    _write_csv(path, cities, 'cp932')
+
+    df = load_csv(str(path))
+
+    assert df['City'].tolist() == cities
+
+
+def test_load_csv_halfwidth_kana(tmp_path):
+    """半角カナを含むcp932のCSVを読み込める"""
+    cities = ['Osaka'] * 30
+    cities[5] = 'ｵｵｻｶ'
+    path = tmp_path / 'sales_kana.csv'
+    _write_csv(path, cities, 'cp932')
+
+    df = load_csv(str(path))
+
+    assert df['City'].tolist() == cities
+
+
+def test_load_csv_euc_jp(tmp_path):
+    """EUC-JPのCSVを読み込める"""
+    cities = ['Tokyo'] * 30
+    cities[8] = '東京'
+    path = tmp_path / 'sales_euc_jp.csv'
+    _write_csv(path, cities, 'euc-jp')
+
+    df = load_csv(str(path))
+
+    assert df['City'].tolist() == cities
+
+
+def test_clean_data_keeps_float64_by_default(tmp_path):
+    """既定では金額系カラムをfloat64のまま保持し、値を丸めない"""
+    path = tmp_path / 'sales.csv'
+    _write_csv(path, ['Tokyo'] * 30, 'utf-8')
+
+    df = clean_data(load_csv(str(path)))
+
+    assert df['Sales'].dtype == np.float64
+    assert df['Sales'].iloc[0] == 10.5
+    assert df['Profit'].tolist()[1] == 1.25
+
+
+def test_merge_dataframes_mixed_schemas(tmp_path):
+    """型指定なしで読み込まれたファイル（日付が文字列のまま）と型付きのファイルを統合できる"""
+    typed_path = tmp_path / 'typed.csv'
+    _write_csv(typed_path, ['Tokyo'] * 12, 'utf-8')
+    # Quantityに欠損値があると型指定付きの読み込みに失敗し、日付は文字列のまま読み込まれる
+    untyped_path = tmp_path / 'untyped.csv'
+    lines = ["Order Date,Sales,Profit,Product Name,City,Quantity"]
+    lines += [f"2/{i + 1}/2017,{i}.5,{i}.75,Binder {i},Osaka,{'' if i == 0 else i}" for i in range(12)]
+    untyped_path.write_text("\n".join(lines) + "\n", encoding='utf-8')
+    typed = load_csv(str(typed_path))
+    typed['Quantity'] = np.int32(1)
+    untyped = load_csv(str(untyped_path))
+
+    merged = clean_data(merge_dataframes([typed, untyped]))
+
+    assert len(merged) == 24
+    assert pd.api.types.is_datetime64_any_dtype(merged['Order Date'])
+    assert merged['Order Date'].notna().all()
+    assert merged['City'].tolist() == ['Tokyo'] * 12 + ['Osaka'] * 12
@@ -0,0 +1,57 @@
+"""
+売上予測モジュールのテスト
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+
+from src.predictor import _civil_from_days, _date_features, _fit_linear
+
+
+def _assert_matches_sklearn(X: np.ndarray, y: np.ndarray) -> None:
+    """_fit_linearの係数・切片・予測値がscikit-learnのLinearRegressionと一致することを確認する"""
+    coef, intercept = _fit_linear(X, y)
+    model = LinearRegression().fit(X, y)
+
+    np.testing.assert_allclose(coef, model.coef_, rtol=1e-6, atol=1e-8)
+    assert np.isclose(intercept, model.intercept_, rtol=1e-6, atol=1e-8)
+    np.testing.assert_allclose(X @ coef + intercept, model.predict(X), rtol=1e-6, atol=1e-8)
+
+
+def test_fit_linear_matches_sklearn():
+    """正規方程式による係数・切片・予測値がLinearRegressionと一致する"""
+    rng = np.random.default_rng(0)
+    X = rng.integers(0, 400, size=(500, 6)).astype(np.float64)
+    y = X @ np.array([3.0, -1.5, 0.2, 7.0, 0.0, 12.0]) + 100 + rng.normal(0, 50, 500)
+
+    _assert_matches_sklearn(X, y)
+
+
+def test_fit_linear_matches_sklearn_with_constant_feature():
+    """一定値の列を含む（特異な）場合も最小ノルム解でLinearRegressionと一致する"""
+    rng = np.random.default_rng(1)
+    X = rng.integers(0, 30, size=(200, 4)).astype(np.float64)
+    X[:, 2] = 2016
+    y = X @ np.array([1.0, 2.0, 0.0, -3.0]) + rng.normal(0, 5, 200)
+
+    _assert_matches_sklearn(X, y)
+
+
+def test_date_features_match_pandas():
+    """整数演算による年月日・曜日・四半期がpandasの日付アクセサと一致する（2000年の閏日、閏年でない2100年を含む）"""
+    dates = pd.Series(pd.date_range('1999-12-25', '2001-03-05').append(pd.date_range('2100-02-28', '2100-03-01')))
+    days = dates.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]').view(np.int64)
+
+    year, month, day = _civil_from_days(days)
+    features = _date_features(days)
+
+    np.testing.assert_array_equal(year, dates.dt.year)
+    np.testing.assert_array_equal(month, dates.dt.month)
+    np.testing.assert_array_equal(day, dates.dt.day)
+    np.testing.assert_array_equal(features['Year'], dates.dt.year)
+    np.testing.assert_array_equal(features['Month'], dates.dt.month)
+    np.testing.assert_array_equal(features['DayOfMonth'], dates.dt.day)
+    np.testing.assert_array_equal(features['DayOfWeek'], dates.dt.dayofweek)
+    np.testing.assert_array_equal(features['Quarter'], dates.dt.quarter)
+    np.testing.assert_array_equal(features['IsWeekend'], dates.dt.dayofweek >= 5)
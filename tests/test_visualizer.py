@@ -0,0 +1,71 @@
+"""
+可視化モジュールのテスト
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.visualizer import MAX_LINE_POINTS, downsample_lttb, make_line_trace, plot_yoy_comparison
+
+
+def test_downsample_lttb_keeps_endpoints_and_spike():
+    """間引き後も先頭・末尾の点と、突出した値（スパイク）が残る"""
+    rng = np.random.default_rng(0)
+    y = rng.normal(100, 5, 50_000)
+    y[12_345] = 10_000
+
+    idx = downsample_lttb(y, MAX_LINE_POINTS)
+
+    assert len(idx) == MAX_LINE_POINTS
+    assert idx[0] == 0
+    assert idx[-1] == len(y) - 1
+    assert 12_345 in idx
+    assert np.all(np.diff(idx) > 0)
+
+
+def test_make_line_trace_downsamples_long_series():
+    """MAX_LINE_POINTSを超える日付系列は、先頭・末尾を残してMAX_LINE_POINTS点に間引かれる"""
+    x = pd.date_range('2000-01-01', periods=20_000, freq='h')
+    y = np.sin(np.arange(20_000) / 50.0)
+
+    trace = make_line_trace(x, y, 'Sales')
+
+    assert len(trace.y) == MAX_LINE_POINTS
+    assert trace.x[0] == x.to_numpy()[0]
+    assert trace.x[-1] == x.to_numpy()[-1]
+    assert trace.y[0] == y[0]
+    assert trace.y[-1] == y[-1]
+
+
+def test_make_line_trace_passes_short_series_through():
+    """MAX_LINE_POINTS以下の系列は間引かずにそのまま描画する"""
+    x = pd.date_range('2000-01-01', periods=MAX_LINE_POINTS, freq='D')
+    y = np.arange(MAX_LINE_POINTS, dtype=np.float64)
+
+    trace = make_line_trace(x, y, 'Sales')
+
+    np.testing.assert_array_equal(trace.y, y)
+    np.testing.assert_array_equal(trace.x, x.to_numpy())
+
+
+def test_plot_yoy_comparison_matches_groupby():
+    """年別・月別の売上がgroupby([年, 月]).sum()と一致し、データのない月は棒を作らない"""
+    rng = np.random.default_rng(0)
+    dates = pd.Series(pd.date_range('2015-01-01', '2017-12-31', freq='D'))
+    # 2016年は4月〜6月のデータがない
+    dates = dates[~((dates.dt.year == 2016) & dates.dt.month.isin([4, 5, 6]))]
+    df = pd.DataFrame({
+        'Order Date': dates.repeat(3).reset_index(drop=True),
+        'Sales': rng.uniform(0, 500, len(dates) * 3)
+    })
+
+    fig = plot_yoy_comparison(df)
+
+    expected = df.groupby([df['Order Date'].dt.year, df['Order Date'].dt.month])['Sales'].sum()
+    actual = {
+        (int(trace.name), int(month_name.rstrip('月'))): value
+        for trace in fig.data
+        for month_name, value in zip(trace.x, trace.y)
+    }
+    assert sorted(actual) == sorted(expected.index)
+    np.testing.assert_allclose([actual[key] for key in expected.index], expected.to_numpy())